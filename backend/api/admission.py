@@ -0,0 +1,212 @@
+from flask import request, jsonify
+import functools
+import math
+import os
+import threading
+import time
+
+# Interactive endpoints: concurrent requests, waiting requests and how long
+# a request may wait for a slot
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 4))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 16))
+ADMISSION_DEADLINE_SECONDS = float(os.environ.get('ADMISSION_DEADLINE_SECONDS', 2.0))
+# Batch endpoints get their own, smaller budget so they cannot starve single predictions
+ADMISSION_BATCH_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_BATCH_MAX_IN_FLIGHT', 1))
+ADMISSION_BATCH_MAX_QUEUE = int(os.environ.get('ADMISSION_BATCH_MAX_QUEUE', 4))
+ADMISSION_BATCH_DEADLINE_SECONDS = float(os.environ.get('ADMISSION_BATCH_DEADLINE_SECONDS', 30.0))
+# Clients may ask for a shorter wait (in seconds) than the endpoint's deadline
+DEADLINE_HEADER = 'X-Request-Deadline'
+# Weight of the latest request in the running service time
+_SERVICE_TIME_DECAY = 0.1
+
+# One controller per endpoint
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+class Shed(Exception):
+    """A request rejected by admission control."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a short, deadline-aware wait queue.
+
+    Up to max_in_flight requests run at once and up to max_queue more wait
+    for a slot. A request is rejected at once when the queue is full or when
+    the expected wait (queued requests ahead of it times the running service
+    time, spread over the slots) exceeds its deadline, and after waiting if
+    no slot frees up before the deadline.
+    """
+
+    def __init__(self, name, max_in_flight, max_queue, deadline_seconds):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.in_flight = 0
+        self.waiting = 0
+        self.service_seconds = None
+        self.admitted = 0
+        self.shed = {'queue_full': 0, 'deadline': 0, 'timeout': 0}
+        self._condition = threading.Condition()
+
+    def expected_wait(self, position):
+        """Expected seconds until the request at a queue position gets a slot."""
+        service = self.service_seconds or 0.0
+        return position * service / max(self.max_in_flight, 1)
+
+    def _retry_after(self):
+        """Seconds a shed client should wait, at least 1."""
+        return max(1, math.ceil(self.expected_wait(self.waiting + 1)))
+
+    def acquire(self, deadline_seconds=None):
+        """
+        Wait for a slot.
+
+        Args:
+            deadline_seconds (float): Longest wait, at most the controller's deadline;
+                None (or NaN) waits up to the controller's deadline
+
+        Raises:
+            Shed: When the request is rejected
+        """
+        if deadline_seconds is None or math.isnan(deadline_seconds):
+            deadline_seconds = self.deadline_seconds
+        else:
+            deadline_seconds = min(max(deadline_seconds, 0.0), self.deadline_seconds)
+        with self._condition:
+            if self.in_flight < self.max_in_flight and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.shed['queue_full'] += 1
+                raise Shed('queue_full', self._retry_after())
+            if self.expected_wait(self.waiting + 1) > deadline_seconds:
+                self.shed['deadline'] += 1
+                raise Shed('deadline', self._retry_after())
+
+            end = time.monotonic() + deadline_seconds
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        self.shed['timeout'] += 1
+                        raise Shed('timeout', self._retry_after())
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+
+    def release(self, seconds):
+        """
+        Free a slot.
+
+        Args:
+            seconds (float): Time the request held the slot
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if self.service_seconds is None:
+                self.service_seconds = seconds
+            else:
+                self.service_seconds += _SERVICE_TIME_DECAY * (seconds - self.service_seconds)
+            self._condition.notify()
+
+    def stats(self):
+        """Current load and admission counters."""
+        with self._condition:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'deadline_seconds': self.deadline_seconds,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'service_ms': self.service_seconds * 1000 if self.service_seconds is not None else None,
+                'admitted': self.admitted,
+                'shed': dict(self.shed),
+                'shed_total': sum(self.shed.values())
+            }
+
+
+def get_controller(name, batch=False):
+    """
+    Admission controller of an endpoint, created with the interactive or batch budget.
+
+    Args:
+        name (str): Endpoint name
+        batch (bool): Use the batch budget
+
+    Returns:
+        AdmissionController: The endpoint's controller
+    """
+    with _controllers_lock:
+        if name not in _controllers:
+            if batch:
+                _controllers[name] = AdmissionController(name, ADMISSION_BATCH_MAX_IN_FLIGHT, ADMISSION_BATCH_MAX_QUEUE,
+                                                         ADMISSION_BATCH_DEADLINE_SECONDS)
+            else:
+                _controllers[name] = AdmissionController(name, ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE,
+                                                         ADMISSION_DEADLINE_SECONDS)
+        return _controllers[name]
+
+
+def admission_stats():
+    """Stats of every endpoint's controller."""
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {name: controller.stats() for name, controller in controllers.items()}
+
+
+def _request_deadline():
+    """Deadline the client sent, in seconds, or None if missing or not a finite positive number."""
+    try:
+        deadline = float(request.headers[DEADLINE_HEADER])
+    except (KeyError, ValueError):
+        return None
+    return deadline if math.isfinite(deadline) and deadline > 0 else None
+
+
+def admission_controlled(name, batch=False, batch_payloads=False):
+    """
+    Decorate a view so it runs under its endpoint's admission controller.
+
+    Shed requests get a 503 with a Retry-After header.
+
+    Args:
+        name (str): Endpoint name
+        batch (bool): The endpoint takes batches and uses the batch budget
+        batch_payloads (bool): Requests whose JSON body is a list use a
+            separate '<name>/batch' controller with the batch budget
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if batch_payloads and isinstance(request.get_json(silent=True), list):
+                controller = get_controller(f"{name}/batch", True)
+            else:
+                controller = get_controller(name, batch)
+            try:
+                controller.acquire(_request_deadline())
+            except Shed as shed:
+                response = jsonify({
+                    "success": False,
+                    "error": f"Server busy ({shed.reason}), retry later"
+                })
+                response.headers['Retry-After'] = str(shed.retry_after)
+                return response, 503
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release(time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+import os
+import itertools
+import logging
+import threading
+import time
+from bisect import bisect_right
+
+from .predict import _load_model
+
+logger = logging.getLogger(__name__)
+
+# Live counters are split into stripes, each with its own lock, so
+# concurrent requests rarely wait on each other
+DRIFT_STRIPES = int(os.environ.get('DRIFT_STRIPES', 8))
+# Unseen categories tracked per feature before the rest are pooled
+MAX_CATEGORIES = 1000
+OTHER_CATEGORY = '__other__'
+# Rows needed before a feature gets a drift status
+DRIFT_MIN_ROWS = int(os.environ.get('DRIFT_MIN_ROWS', 100))
+# Population stability index thresholds for moderate and significant drift
+PSI_THRESHOLDS = (0.1, 0.25)
+# Floor on bin shares so empty bins keep the distances finite
+_EPSILON = 1e-4
+
+# Cache the monitor of the loaded model
+_monitor = None
+
+# Each serving thread gets the next slot number once, so threads spread evenly over
+# the stripes (thread idents are aligned addresses and share their low bits)
+_thread_slot = threading.local()
+_next_slot = itertools.count()
+
+
+def _slot():
+    """Slot number of the calling thread."""
+    slot = getattr(_thread_slot, 'value', None)
+    if slot is None:
+        slot = _thread_slot.value = next(_next_slot)
+    return slot
+
+
+def _shares(counts):
+    """Bin shares floored at _EPSILON and renormalized."""
+    counts = np.asarray(counts, dtype=float)
+    shares = counts / counts.sum() if counts.sum() > 0 else np.full(len(counts), 1.0 / len(counts))
+    shares = np.maximum(shares, _EPSILON)
+    return shares / shares.sum()
+
+
+def distribution_distances(reference_counts, live_counts, ordered=False):
+    """
+    Distances between a reference and a live histogram over the same bins.
+
+    Args:
+        reference_counts (array-like): Reference count per bin
+        live_counts (array-like): Live count per bin
+        ordered (bool): Whether bins are ordered (numeric), which adds the
+            Kolmogorov-Smirnov statistic on the binned CDFs
+
+    Returns:
+        dict: Population stability index (psi), Jensen-Shannon distance
+        (js_distance, base 2, between 0 and 1) and, for ordered bins, ks
+    """
+    q = _shares(reference_counts)
+    p = _shares(live_counts)
+    m = (p + q) / 2
+    js = 0.5 * np.sum(p * np.log2(p / m)) + 0.5 * np.sum(q * np.log2(q / m))
+    distances = {
+        'psi': float(np.sum((p - q) * np.log(p / q))),
+        'js_distance': float(np.sqrt(max(js, 0.0)))
+    }
+    if ordered:
+        distances['ks'] = float(np.max(np.abs(np.cumsum(p) - np.cumsum(q))))
+    return distances
+
+
+def drift_status(psi):
+    """Conventional reading of a population stability index."""
+    if psi < PSI_THRESHOLDS[0]:
+        return 'stable'
+    if psi < PSI_THRESHOLDS[1]:
+        return 'moderate'
+    return 'significant'
+
+
+class _Stripe:
+    """One set of live counters and the lock guarding it."""
+
+    def __init__(self, reference):
+        self.lock = threading.Lock()
+        self.clear(reference)
+
+    def clear(self, reference):
+        """Zero the counters in place; the caller holds the lock."""
+        self.rows = 0
+        self.seconds = 0.0
+        self.calls = 0
+        self.numeric = {col: np.zeros(len(ref['edges']) + 1, dtype=np.int64)
+                        for col, ref in reference.items() if ref['type'] == 'numeric'}
+        self.missing = {col: 0 for col in reference}
+        self.categorical = {col: {} for col, ref in reference.items() if ref['type'] == 'categorical'}
+
+
+class DriftMonitor:
+    """
+    Streaming histograms of served inputs, compared with the training reference.
+
+    Numeric features are counted on the reference's fixed quantile bins and
+    categorical features in count tables, so recording a row is O(1) per
+    feature and memory does not grow with traffic. Each request updates one
+    stripe of counters, chosen by thread, under that stripe's lock only.
+    """
+
+    def __init__(self, reference, stripes=DRIFT_STRIPES):
+        self.reference = reference['features']
+        self.edges = {col: list(ref['edges']) for col, ref in self.reference.items() if ref['type'] == 'numeric'}
+        self.edge_arrays = {col: np.asarray(edges) for col, edges in self.edges.items()}
+        self.stripes = [_Stripe(self.reference) for _ in range(stripes)]
+        self.started = time.time()
+
+    def _count_category(self, table, value, count=1):
+        """Add to a category count, pooling new categories beyond MAX_CATEGORIES."""
+        if value not in table and len(table) >= MAX_CATEGORIES:
+            value = OTHER_CATEGORY
+        table[value] = table.get(value, 0) + count
+
+    def update(self, data):
+        """
+        Record served inputs.
+
+        Args:
+            data (dict or DataFrame): One preprocessed record or several
+        """
+        start = time.perf_counter()
+        stripe = self.stripes[_slot() % len(self.stripes)]
+        with stripe.lock:
+            if isinstance(data, dict):
+                self._update_record(stripe, data)
+                rows = 1
+            else:
+                self._update_frame(stripe, data)
+                rows = len(data)
+            stripe.rows += rows
+            stripe.calls += 1
+            stripe.seconds += time.perf_counter() - start
+
+    def _update_record(self, stripe, record):
+        """Single-record path without pandas, the common case of /api/predict."""
+        for col, edges in self.edges.items():
+            try:
+                value = float(record.get(col))
+            except (TypeError, ValueError):
+                value = float('nan')
+            if value != value:  # NaN
+                stripe.missing[col] += 1
+            else:
+                stripe.numeric[col][bisect_right(edges, value)] += 1
+        for col, table in stripe.categorical.items():
+            value = record.get(col)
+            if value is None or value != value:
+                stripe.missing[col] += 1
+            else:
+                self._count_category(table, str(value))
+
+    def _update_frame(self, stripe, df):
+        """Vectorized path for batches."""
+        for col, edges in self.edge_arrays.items():
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) if col in df else np.full(len(df), np.nan)
+            present = values[~np.isnan(values)]
+            stripe.missing[col] += len(values) - len(present)
+            stripe.numeric[col] += np.bincount(np.searchsorted(edges, present, side='right'),
+                                               minlength=len(edges) + 1)
+        for col, table in stripe.categorical.items():
+            values = df[col] if col in df else pd.Series([None] * len(df))
+            stripe.missing[col] += int(values.isnull().sum())
+            for value, count in values.dropna().astype(str).value_counts().items():
+                self._count_category(table, value, int(count))
+
+    def reset(self):
+        """Start a new monitoring window."""
+        # Stripes are cleared in place: an update that picked a stripe before
+        # the reset then records into the new window instead of a discarded stripe
+        for stripe in self.stripes:
+            with stripe.lock:
+                stripe.clear(self.reference)
+        self.started = time.time()
+
+    def report(self):
+        """
+        Compare the live window with the reference.
+
+        Returns:
+            dict: Rows recorded, mean recording overhead per request and, per
+            feature, its distances to the reference, live count and status
+        """
+        rows = calls = 0
+        seconds = 0.0
+        numeric = {col: np.zeros(len(edges) + 1, dtype=np.int64) for col, edges in self.edges.items()}
+        missing = {col: 0 for col in self.reference}
+        categorical = {col: {} for col, ref in self.reference.items() if ref['type'] == 'categorical'}
+        for stripe in self.stripes:
+            with stripe.lock:
+                rows += stripe.rows
+                calls += stripe.calls
+                seconds += stripe.seconds
+                for col in numeric:
+                    numeric[col] += stripe.numeric[col]
+                for col in missing:
+                    missing[col] += stripe.missing[col]
+                for col, table in stripe.categorical.items():
+                    for value, count in table.items():
+                        categorical[col][value] = categorical[col].get(value, 0) + count
+
+        features = {}
+        for col, ref in self.reference.items():
+            if ref['type'] == 'numeric':
+                live = numeric[col]
+                result = distribution_distances(ref['counts'], live, ordered=True)
+                result['live_counts'] = live.tolist()
+            else:
+                categories = list(ref['counts']) + [value for value in categorical[col] if value not in ref['counts']]
+                live = np.array([categorical[col].get(value, 0) for value in categories])
+                result = distribution_distances([ref['counts'].get(value, 0) for value in categories], live)
+                unseen = live[len(ref['counts']):].sum()
+                result['unseen_share'] = float(unseen / live.sum()) if live.sum() else 0.0
+            result['type'] = ref['type']
+            result['live_rows'] = int(live.sum())
+            result['missing'] = int(missing[col])
+            result['status'] = drift_status(result['psi']) if live.sum() >= DRIFT_MIN_ROWS else 'insufficient data'
+            features[col] = result
+
+        return {
+            'window_started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'rows': rows,
+            'requests': calls,
+            'overhead_us_per_request': seconds / calls * 1e6 if calls else 0.0,
+            'drifted_features': [col for col, result in features.items() if result['status'] == 'significant'],
+            'features': features
+        }
+
+
+def get_monitor():
+    """
+    Drift monitor of the loaded model.
+
+    Returns:
+        DriftMonitor: Monitor, or None if the model manifest has no drift reference
+    """
+    global _monitor
+
+    if _monitor is None:
+        _, features = _load_model()
+        reference = features.get('drift_reference')
+        if reference is None:
+            return None
+        _monitor = DriftMonitor(reference)
+    return _monitor
+
+
+def record_inputs(data):
+    """
+    Record served inputs for drift monitoring, never failing the request.
+
+    Args:
+        data (dict or DataFrame): Preprocessed inputs
+    """
+    try:
+        monitor = get_monitor()
+        if monitor is not None:
+            monitor.update(data)
+    except Exception as e:
+        logger.warning(f"Error recording inputs for drift monitoring: {str(e)}")
@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse
+import weakref
+from math import comb, factorial
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeRegressor
+
+from .predict import _load_model
+from .routing import FALLBACK, get_router
+
+# Upper bound on the (rows x leaves x features) elements processed at once,
+# which bounds memory for large batches and deep forests
+BLOCK_ELEMENTS = 2000000
+
+# Largest per-leaf table of precomputed contributions (leaves x patterns x slots)
+PATTERN_TABLE_SIZE = 4000000
+
+# Cache the leaf table of each model explained: key -> (weak reference to the pipeline, table).
+# Segment models evicted from the model cache are not kept alive by their tables.
+_explainers = {}
+
+
+class UnsupportedModel(Exception):
+    """A model whose predictions cannot be explained."""
+
+
+def feature_groups(preprocessor, features):
+    """
+    Map every column produced by a fitted ColumnTransformer to its input feature.
+
+    Args:
+        preprocessor (ColumnTransformer): Fitted preprocessor
+        features (list): Input feature names
+
+    Returns:
+        ndarray: Input feature index of each output column
+    """
+    groups = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        last = transformer.steps[-1][1] if isinstance(transformer, Pipeline) else transformer
+        drop_idx = getattr(last, 'drop_idx_', None)
+        for i, column in enumerate(columns):
+            if hasattr(last, 'categories_'):
+                # One indicator column per category, less the dropped one
+                width = len(last.categories_[i])
+                if drop_idx is not None and drop_idx[i] is not None:
+                    width -= 1
+            else:
+                width = 1
+            groups.extend([features.index(column)] * width)
+    return np.asarray(groups)
+
+
+def _trees(estimator):
+    """Fitted trees of a supported model, each with the weight of its output."""
+    if isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)):
+        return [(tree.tree_, 1.0 / len(estimator.estimators_)) for tree in estimator.estimators_]
+    if isinstance(estimator, GradientBoostingRegressor):
+        return [(tree.tree_, estimator.learning_rate) for tree in estimator.estimators_[:, 0]]
+    if isinstance(estimator, DecisionTreeRegressor):
+        return [(estimator.tree_, 1.0)]
+    # HistGradientBoostingRegressor is not supported: its trees split on binned
+    # values and category bitsets rather than the thresholds of sklearn trees
+    raise UnsupportedModel(f"Explanations are only available for tree-based models with sklearn trees "
+                           f"(random forest, extra trees, gradient boosting), not {type(estimator).__name__}")
+
+
+def build_leaf_table(estimator, groups, n_groups):
+    """
+    Flatten every root-to-leaf path of a tree ensemble into padded arrays.
+
+    Each path is reduced to the input features it splits on (its slots),
+    padded to the longest such list with slots that every row follows and
+    that keep the whole cover.
+
+    Args:
+        estimator: Fitted RandomForest, ExtraTrees, GradientBoosting or decision tree regressor
+        groups (ndarray): Input feature index of each model column
+        n_groups (int): Number of input features
+
+    Returns:
+        dict: Per-leaf weighted values and input feature of each slot, the
+        splits on each path (column, threshold, direction, slot bit) and, per
+        slot, the fraction of the training cover that follows the path's
+        splits on that feature
+    """
+    values, paths, slot_groups, zero_fractions = [], [], [], []
+    for tree, weight in _trees(estimator):
+        left, right = tree.children_left, tree.children_right
+        cover = tree.weighted_n_node_samples
+        stack = [(0, [], {})]
+        while stack:
+            node, path, z = stack.pop()
+            if left[node] == -1:
+                values.append(weight * tree.value[node, 0, 0])
+                paths.append(path)
+                slot_groups.append(list(z))
+                zero_fractions.append(list(z.values()))
+                continue
+            column, threshold = tree.feature[node], tree.threshold[node]
+            group = int(groups[column])
+            for child, goes_left in ((left[node], True), (right[node], False)):
+                child_z = dict(z)
+                child_z[group] = child_z.get(group, 1.0) * cover[child] / cover[node]
+                stack.append((child, path + [(column, threshold, goes_left, group)], child_z))
+
+    n_leaves = len(paths)
+    depth = max(1, max(len(path) for path in paths))
+    n_slots = max(1, max(len(slots) for slots in slot_groups))
+    # Padding steps compare against +inf and go left, so they are always satisfied;
+    # padding slots map to an extra feature column that is dropped
+    step_column = np.zeros((n_leaves, depth), dtype=np.int64)
+    step_threshold = np.full((n_leaves, depth), np.inf)
+    step_left = np.ones((n_leaves, depth), dtype=bool)
+    step_bit = np.zeros((n_leaves, depth), dtype=np.int64)
+    slot_group = np.full((n_leaves, n_slots), n_groups, dtype=np.int64)
+    zero_fraction = np.ones((n_leaves, n_slots))
+    for i, (path, slots, z) in enumerate(zip(paths, slot_groups, zero_fractions)):
+        slot_group[i, :len(slots)] = slots
+        zero_fraction[i, :len(z)] = z
+        for j, (column, threshold, goes_left, group) in enumerate(path):
+            step_column[i, j] = column
+            step_threshold[i, j] = threshold
+            step_left[i, j] = goes_left
+            step_bit[i, j] = 1 << slots.index(group)
+
+    # Shapley weight of each coefficient of a path polynomial: the features
+    # off the path are null players whose (t + 1) factors are folded in here
+    n_null = n_groups - n_slots
+    slot_weights = np.array([
+        sum(comb(n_null, k - j) * factorial(k) * factorial(n_groups - k - 1) / factorial(n_groups)
+            for k in range(j, j + n_null + 1))
+        for j in range(n_slots)
+    ])
+    values = np.asarray(values)
+
+    # A row only matters to a leaf through which slots it fails, so with few
+    # slots the contributions of every failure pattern are precomputed and
+    # explaining a row is a lookup
+    pattern_contribution = None
+    n_patterns = 2 ** n_slots
+    if n_leaves * n_patterns * n_slots <= PATTERN_TABLE_SIZE:
+        failed = np.arange(n_patterns)
+        o = ((failed[None, :, None] >> np.arange(n_slots)[:, None, None]) & 1) == 0
+        o = np.broadcast_to(o, (n_slots, n_patterns, n_leaves)).astype(float)
+        contribution = _path_contributions(o, zero_fraction.T[:, None, :], slot_weights) * values
+        # (slot, leaf * pattern), indexed by leaf * n_patterns + failed slot bits
+        pattern_contribution = contribution.transpose(0, 2, 1).reshape(n_slots, -1)
+
+    base = 0.0
+    if isinstance(estimator, GradientBoostingRegressor):
+        base = estimator.init_
+    return {
+        'value': values,
+        'step_column': step_column,
+        'step_threshold': step_threshold,
+        'step_left': step_left,
+        'step_bit': step_bit,
+        'slot_group': slot_group,
+        'zero_fraction': zero_fraction,
+        'slot_weights': slot_weights,
+        'pattern_contribution': pattern_contribution,
+        'base': base,
+        'n_groups': n_groups
+    }
+
+
+def _path_contributions(o, z, weights):
+    """
+    Shapley contributions of each slot of a set of paths, before scaling by the leaf value.
+
+    For one leaf, the expected output when only the features in S are known
+    is value * prod(o_j for j in S) * prod(z_j for j not in S), where o_j is 1
+    if the row follows every split on feature j along the path and z_j is the
+    cover fraction of those splits. The Shapley value of feature i then
+    needs, for each subset size k, the coefficient of t^k in
+    prod_{j != i}(o_j t + z_j). That polynomial is built for all rows and
+    leaves at once and divided by each (o_i t + z_i) term.
+
+    Args:
+        o (ndarray): Whether the rows follow each slot, as (slot, row, leaf)
+        z (ndarray): Cover fraction of each slot, as (slot, 1, leaf)
+        weights (ndarray): Shapley weight of each polynomial coefficient
+
+    Returns:
+        ndarray: Contributions as (slot, row, leaf)
+    """
+    n_slots = len(o)
+
+    # Coefficients of prod_j (o_j t + z_j), lowest degree first
+    poly = np.zeros((n_slots + 1,) + o.shape[1:])
+    poly[0] = 1.0
+    for j in range(n_slots):
+        poly[1:j + 2] = poly[1:j + 2] * z[j] + poly[:j + 1] * o[j]
+        poly[0] *= z[j]
+
+    # o_i = 0: dividing by (0 t + z_i) scales all coefficients
+    absent = np.tensordot(weights, poly[:n_slots], axes=1)
+    contributions = np.empty(o.shape)
+    for i in range(n_slots):
+        # o_i = 1: synthetic division by (t + z_i), accumulating the weighted coefficients
+        quotient = poly[n_slots]
+        present = weights[n_slots - 1] * quotient
+        for k in range(n_slots - 1, 0, -1):
+            quotient = poly[k] - z[i] * quotient
+            present = present + weights[k - 1] * quotient
+        contributions[i] = (o[i] - z[i]) * np.where(o[i] == 1, present, absent / z[i])
+    return contributions
+
+
+def tree_shap(table, X):
+    """
+    Exact path-dependent TreeSHAP values of grouped features, vectorized over rows and leaves.
+
+    The one-hot columns of a categorical feature form one player, so the
+    values are exact Shapley values of the input features. Leaves are
+    processed in blocks to bound memory on large batches.
+
+    Args:
+        table (dict): Leaf table from build_leaf_table()
+        X (ndarray): Rows in the model's input space (after preprocessing)
+
+    Returns:
+        tuple: (contributions of shape (n_rows, n_groups), expected value per row)
+    """
+    X = np.asarray(X, dtype=np.float32)  # Trees compare float32 features
+    n_rows, n_groups = len(X), table['n_groups']
+    n_leaves, n_slots = table['zero_fraction'].shape
+    n_patterns = 2 ** n_slots
+    pattern_contribution = table['pattern_contribution']
+    group_columns = np.eye(n_groups + 1)
+
+    phi = np.zeros((n_rows, n_groups + 1))
+    block = max(1, BLOCK_ELEMENTS // (max(n_rows, 1) * (n_slots + 1)))
+    for start in range(0, n_leaves, block):
+        leaves = slice(start, start + block)
+
+        # Bits of the slots whose splits each row fails, as (row, leaf)
+        failed = np.zeros((n_rows, len(table['value'][leaves])), dtype=np.int64)
+        for d in range(table['step_column'].shape[1]):
+            column = table['step_column'][leaves, d]
+            follows = (X[:, column] <= table['step_threshold'][leaves, d]) == table['step_left'][leaves, d]
+            failed |= np.where(follows, 0, table['step_bit'][leaves, d])
+
+        if pattern_contribution is not None:
+            index = np.arange(start, start + failed.shape[1]) * n_patterns + failed
+            contributions = [pattern_contribution[i][index] for i in range(n_slots)]
+        else:
+            o = (((failed >> np.arange(n_slots)[:, None, None]) & 1) == 0).astype(float)
+            z = table['zero_fraction'][leaves].T[:, None, :]
+            contributions = _path_contributions(o, z, table['slot_weights']) * table['value'][leaves]
+
+        for i in range(n_slots):
+            phi += contributions[i] @ group_columns[table['slot_group'][leaves, i]]
+
+    expected = np.full(n_rows, (table['value'] * table['zero_fraction'].prod(axis=1)).sum())
+    base = table['base']
+    if isinstance(base, str):  # GradientBoosting init='zero'
+        base = 0.0
+    elif not isinstance(base, float):
+        base = np.asarray(base.predict(X), dtype=float).ravel()
+    return phi[:, :n_groups], expected + base
+
+
+def _get_explainer(pipeline, features, key='global'):
+    """Build the leaf table of a model once, and again if the model was reloaded."""
+    for stale in [k for k, (ref, _) in _explainers.items() if ref() is None]:
+        del _explainers[stale]
+    entry = _explainers.get(key)
+    if entry is None or entry[0]() is not pipeline:
+        groups = feature_groups(pipeline.named_steps['preprocessor'], features)
+        entry = (weakref.ref(pipeline), build_leaf_table(pipeline.named_steps['model'], groups, len(features)))
+        _explainers[key] = entry
+    return entry[1]
+
+
+def explain_sales(data):
+    """
+    Explain sales predictions with per-feature contributions.
+
+    Args:
+        data (dict or DataFrame): Preprocessed data, one or several records;
+            records routed to a segment model are explained with that model
+
+    Returns:
+        tuple: (predictions, expected values, contributions) lists with one
+        entry per record; contributions map each input feature to its share
+        of prediction - expected value
+    """
+    try:
+        model, features = _load_model()
+        feature_names = features['categorical_features'] + features['numerical_features']
+
+        df = pd.DataFrame([data]) if isinstance(data, dict) else data.copy()
+        for field in feature_names:
+            if field not in df.columns:
+                raise Exception(f"Missing required field: {field}")
+        df = df[feature_names]
+
+        # Explain each record with the model that predicts it, as ModelRouter.predict does
+        router = get_router()
+        assigned = router.assign(df) if router is not None else np.full(len(df), FALLBACK)
+        predictions = np.empty(len(df))
+        expected = np.empty(len(df))
+        contributions = np.empty((len(df), len(feature_names)))
+        for i in np.unique(assigned):
+            positions = np.flatnonzero(assigned == i)
+            if i == FALLBACK:
+                key, segment_model = 'global', model
+            else:
+                key = router.routes[i].model_path
+                segment_model = router.cache.get(key)
+            pipeline = getattr(segment_model, 'best_estimator_', segment_model)
+
+            X = pipeline.named_steps['preprocessor'].transform(df.iloc[positions])
+            if scipy.sparse.issparse(X):
+                X = X.toarray()
+
+            table = _get_explainer(pipeline, feature_names, key)
+            contributions[positions], expected[positions] = tree_shap(table, X)
+            predictions[positions] = pipeline.named_steps['model'].predict(X)
+
+        return (
+            predictions.tolist(),
+            expected.tolist(),
+            [dict(zip(feature_names, row.tolist())) for row in contributions]
+        )
+
+    except UnsupportedModel:
+        raise
+    except Exception as e:
+        raise Exception(f"Error in explaining prediction: {str(e)}")
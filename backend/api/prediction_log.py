@@ -0,0 +1,254 @@
+import pandas as pd
+import atexit
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .predict import _load_model
+
+logger = logging.getLogger(__name__)
+
+# Logger settings
+PREDICTION_LOG_DIR = os.environ.get('PREDICTION_LOG_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'prediction_logs'))
+PREDICTION_LOG_FORMAT = os.environ.get('PREDICTION_LOG_FORMAT', 'ndjson')  # or 'parquet'
+PREDICTION_LOG_ENABLED = os.environ.get('PREDICTION_LOG_ENABLED', 'True') == 'True'
+# Queued requests (a batch request is one entry) before the policy applies
+PREDICTION_LOG_QUEUE_SIZE = int(os.environ.get('PREDICTION_LOG_QUEUE_SIZE', 10000))
+# 'drop' discards records when the queue is full; 'block' waits up to
+# PREDICTION_LOG_BLOCK_SECONDS for room, then drops
+PREDICTION_LOG_POLICY = os.environ.get('PREDICTION_LOG_POLICY', 'drop')
+PREDICTION_LOG_BLOCK_SECONDS = float(os.environ.get('PREDICTION_LOG_BLOCK_SECONDS', 0.05))
+# The writer flushes when it has this many records or after this many seconds
+PREDICTION_LOG_BATCH_SIZE = int(os.environ.get('PREDICTION_LOG_BATCH_SIZE', 1000))
+PREDICTION_LOG_FLUSH_SECONDS = float(os.environ.get('PREDICTION_LOG_FLUSH_SECONDS', 1.0))
+# A new file is started past this size or age
+PREDICTION_LOG_MAX_BYTES = int(os.environ.get('PREDICTION_LOG_MAX_BYTES', 64 * 1024 ** 2))
+PREDICTION_LOG_MAX_SECONDS = float(os.environ.get('PREDICTION_LOG_MAX_SECONDS', 3600))
+
+# Suffix of a Parquet file still being written (its footer is written on close)
+PART_SUFFIX = '.part'
+
+# Cache the logger of the process
+_prediction_logger = None
+
+
+class PredictionLogger:
+    """
+    Audit log of served inputs and predictions, written off the request thread.
+
+    Requests only put their records on a bounded queue. A writer thread
+    drains it in batches and appends them to gzip-compressed NDJSON or
+    Parquet files, starting a new file past a size or age limit. When the
+    queue is full, records are dropped (policy 'drop') or the request waits
+    briefly for room (policy 'block'); dropped records are counted.
+    """
+
+    def __init__(self, directory=PREDICTION_LOG_DIR, file_format=PREDICTION_LOG_FORMAT,
+                 queue_size=PREDICTION_LOG_QUEUE_SIZE, policy=PREDICTION_LOG_POLICY,
+                 block_seconds=PREDICTION_LOG_BLOCK_SECONDS, batch_size=PREDICTION_LOG_BATCH_SIZE,
+                 flush_seconds=PREDICTION_LOG_FLUSH_SECONDS, max_bytes=PREDICTION_LOG_MAX_BYTES,
+                 max_seconds=PREDICTION_LOG_MAX_SECONDS):
+        if file_format not in ('ndjson', 'parquet'):
+            raise Exception(f"Unknown prediction log format: {file_format}")
+        if file_format == 'parquet' and pyarrow is None:
+            raise Exception("The parquet prediction log requires pyarrow")
+        if policy not in ('drop', 'block'):
+            raise Exception(f"Unknown prediction log policy: {policy}")
+        self.directory = directory
+        self.file_format = file_format
+        self.policy = policy
+        self.block_seconds = block_seconds
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.files = 0
+        self.errors = 0
+        self._counter_lock = threading.Lock()
+
+        self._path = None
+        self._opened = 0.0
+        self._parquet_writer = None
+        self._thread = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+        self._thread.start()
+
+    def log(self, records):
+        """
+        Queue records for writing, without blocking on disk.
+
+        Args:
+            records (list): Records (dicts) of one request
+        """
+        try:
+            if self.policy == 'block':
+                self.queue.put(records, timeout=self.block_seconds)
+            else:
+                self.queue.put_nowait(records)
+            with self._counter_lock:
+                self.enqueued += len(records)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += len(records)
+
+    def stats(self):
+        """Queue depth (queued requests) and record counters."""
+        with self._counter_lock:
+            return {
+                'format': self.file_format,
+                'policy': self.policy,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.queue.maxsize,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'written': self.written,
+                'batches': self.batches,
+                'files': self.files,
+                'errors': self.errors
+            }
+
+    def close(self, timeout=10):
+        """Write what is queued, finish the current file and stop the writer."""
+        if self._thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                logger.error("Prediction log writer is not draining its queue")
+                return
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Writer thread: gather batches until a None entry arrives."""
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    records = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if records is None:
+                    stopping = True
+                    break
+                batch.extend(records)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    with self._counter_lock:
+                        self.errors += 1
+                    logger.error(f"Error writing prediction log: {str(e)}")
+            elif self._path is not None and time.time() - self._opened > self.max_seconds:
+                self._rotate()
+        self._rotate()
+
+    def _write(self, batch):
+        """Append one batch to the current file, starting a new one when due."""
+        table = None
+        if self.file_format == 'parquet':
+            table = pyarrow.Table.from_pandas(pd.DataFrame(batch), preserve_index=False)
+            if self._parquet_writer is not None and table.schema != self._parquet_writer.schema:
+                try:
+                    table = table.cast(self._parquet_writer.schema)
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, ValueError):
+                    # Columns changed type (e.g. all null in the first batch): start a new file
+                    self._rotate()
+
+        if self._path is not None and (time.time() - self._opened > self.max_seconds or
+                                       os.path.getsize(self._path) > self.max_bytes):
+            self._rotate()
+        if self._path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            name = f"predictions-{stamp}-{os.getpid()}"
+            if self.file_format == 'parquet':
+                self._path = os.path.join(self.directory, name + '.parquet' + PART_SUFFIX)
+                self._parquet_writer = pyarrow.parquet.ParquetWriter(self._path, table.schema, compression='zstd')
+            else:
+                self._path = os.path.join(self.directory, name + '.ndjson.gz')
+            self._opened = time.time()
+            with self._counter_lock:
+                self.files += 1
+
+        if self.file_format == 'parquet':
+            self._parquet_writer.write_table(table)
+        else:
+            # Each batch is a complete gzip member; readers see concatenated members as one stream
+            lines = ''.join(json.dumps(record, default=str) + '\n' for record in batch)
+            with gzip.open(self._path, 'ab') as f:
+                f.write(lines.encode('utf-8'))
+        with self._counter_lock:
+            self.written += len(batch)
+            self.batches += 1
+
+    def _rotate(self):
+        """Finish the current file."""
+        if self._path is None:
+            return
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+            os.replace(self._path, self._path[:-len(PART_SUFFIX)])
+        self._path = None
+
+
+def get_prediction_logger():
+    """
+    Prediction logger of this process, started on first use.
+
+    Returns:
+        PredictionLogger: Logger, or None if logging is disabled
+    """
+    global _prediction_logger
+
+    if _prediction_logger is None and PREDICTION_LOG_ENABLED:
+        _prediction_logger = PredictionLogger()
+        atexit.register(_prediction_logger.close)
+    return _prediction_logger
+
+
+def log_predictions(data, predictions, endpoint):
+    """
+    Queue served inputs and predictions for the audit log, never failing the request.
+
+    Args:
+        data (dict or DataFrame): Preprocessed inputs
+        predictions (float or list): Predictions, one per record
+        endpoint (str): Endpoint that served them
+    """
+    try:
+        prediction_logger = get_prediction_logger()
+        if prediction_logger is None:
+            return
+        # The manifest's creation time identifies the model version
+        model_version = str(_load_model()[1].get('created', 'unknown'))
+        records = [dict(data)] if isinstance(data, dict) else data.to_dict('records')
+        if not isinstance(predictions, list):
+            predictions = [predictions]
+        timestamp = datetime.datetime.now().isoformat(timespec='milliseconds')
+        for record, prediction in zip(records, predictions):
+            record['Prediction'] = prediction
+            record['Timestamp'] = timestamp
+            record['Endpoint'] = endpoint
+            record['Model Version'] = model_version
+        prediction_logger.log(records)
+    except Exception as e:
+        logger.warning(f"Error queueing prediction log records: {str(e)}")
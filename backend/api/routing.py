@@ -0,0 +1,279 @@
+import numpy as np
+import pandas as pd
+import joblib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Routing settings: records are only routed if the routes file exists
+MODEL_ROUTES_PATH = os.environ.get('MODEL_ROUTES_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'model', 'routes.json'))
+# Memory budget of the resident segment models; the global model is not counted
+MODEL_CACHE_BYTES = int(os.environ.get('MODEL_CACHE_BYTES', 256 * 1024 ** 2))
+
+# Route index of records no rule matches
+FALLBACK = -1
+
+# Cache the router of this process
+_router = None
+
+
+def model_bytes(model):
+    """
+    Approximate memory held by a loaded model: the size of its uncompressed pickle.
+
+    The artifact file can be much smaller than the model in memory when it
+    was saved with MODEL_COMPRESS, so its size can't be used for the budget.
+    """
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ModelCache:
+    """
+    Lazily loaded models, kept under a memory budget in least recently used order.
+
+    A model is loaded on its first request. When the resident models exceed
+    max_bytes, the least recently used ones are evicted until they fit; the
+    model just requested is always kept, even if it alone exceeds the budget.
+    Concurrent requests for a model that is not resident load it once.
+    """
+
+    def __init__(self, max_bytes=MODEL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._models = OrderedDict()  # path -> (model, bytes), least recently used first
+        self._loading = {}  # path -> lock held while the model loads
+        self._sizes = {}  # (path, file size, mtime) -> model_bytes, measured once per artifact version
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """
+        Model saved at a path, loading it if it is not resident.
+
+        Args:
+            path (str): Path of the joblib artifact
+
+        Returns:
+            Fitted model
+        """
+        with self._lock:
+            if path in self._models:
+                self._models.move_to_end(path)
+                self.hits += 1
+                return self._models[path][0]
+            load_lock = self._loading.setdefault(path, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another request may have loaded it while this one waited
+                if path in self._models:
+                    self._models.move_to_end(path)
+                    self.hits += 1
+                    return self._models[path][0]
+            try:
+                model = joblib.load(path)
+            except Exception as e:
+                raise Exception(f"Error loading segment model {path}: {str(e)}")
+            stat = os.stat(path)
+            version = (path, stat.st_size, stat.st_mtime)
+            if version not in self._sizes:
+                self._sizes[version] = model_bytes(model)
+            size = self._sizes[version]
+
+            with self._lock:
+                self.misses += 1
+                self._models[path] = (model, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes and len(self._models) > 1:
+                    evicted, (_, evicted_size) = self._models.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+                    logger.info(f"Evicted segment model {evicted} ({evicted_size} bytes)")
+                self._loading.pop(path, None)
+            return model
+
+    def stats(self):
+        """Resident models and cache counters."""
+        with self._lock:
+            return {
+                'max_bytes': self.max_bytes,
+                'bytes': self.bytes,
+                'resident': [os.path.basename(path) for path in self._models],
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class Route:
+    """
+    A segment model and the records it serves.
+
+    Conditions map a feature to a value, a list of values, or a range
+    {"min": ..., "max": ...} (both bounds inclusive and optional). A record
+    matches when it meets every condition.
+    """
+
+    def __init__(self, name, model_path, when):
+        if not when:
+            raise Exception(f"Route {name} has no conditions")
+        self.name = name
+        self.model_path = model_path
+        self.when = when
+        # Key of each condition, identical for the same condition in another route
+        self._conditions = [((feature, json.dumps(condition, sort_keys=True, default=str)), feature, condition)
+                            for feature, condition in when.items()]
+
+    def matches(self, df, masks=None):
+        """
+        Records of a frame this route serves.
+
+        Args:
+            df (DataFrame): Preprocessed records
+            masks (dict): Masks of conditions already evaluated on df, shared
+                by the routes of one batch since many repeat a condition
+
+        Returns:
+            ndarray: Boolean mask
+        """
+        masks = {} if masks is None else masks
+        mask = np.ones(len(df), dtype=bool)
+        for key, feature, condition in self._conditions:
+            if key not in masks:
+                masks[key] = self._condition_mask(df, feature, condition)
+            mask &= masks[key]
+        return mask
+
+    @staticmethod
+    def _condition_mask(df, feature, condition):
+        """Records of a frame meeting one condition."""
+        if feature not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        values = df[feature]
+        if isinstance(condition, dict):
+            values = pd.to_numeric(values, errors='coerce')
+            mask = np.ones(len(df), dtype=bool)
+            if 'min' in condition:
+                mask &= (values >= condition['min']).to_numpy()
+            if 'max' in condition:
+                mask &= (values <= condition['max']).to_numpy()
+            return mask
+        allowed = condition if isinstance(condition, list) else [condition]
+        return values.isin(allowed).to_numpy()
+
+
+class ModelRouter:
+    """
+    Routes each record to the model of its segment, or to the global model.
+
+    Routes are tried in order and the first match wins. A batch is split
+    into one sub-frame per model, each scored in a single call, and the
+    predictions are written back at the records' original positions.
+    """
+
+    def __init__(self, routes, cache=None):
+        self.routes = routes
+        self.cache = cache if cache is not None else ModelCache()
+        self.records = {route.name: 0 for route in routes}
+        self.records['global'] = 0
+        self._lock = threading.Lock()
+
+    def assign(self, df):
+        """
+        Route index of every record.
+
+        Args:
+            df (DataFrame): Preprocessed records
+
+        Returns:
+            ndarray: Index into routes per record, FALLBACK for the global model
+        """
+        assigned = np.full(len(df), FALLBACK)
+        masks = {}
+        for i, route in enumerate(self.routes):
+            unassigned = assigned == FALLBACK
+            if not unassigned.any():
+                break
+            assigned[unassigned & route.matches(df, masks)] = i
+        return assigned
+
+    def predict(self, df, global_model):
+        """
+        Predict every record with the model of its segment.
+
+        Args:
+            df (DataFrame): Preprocessed records, ready for the models
+            global_model: Model of records no route matches
+
+        Returns:
+            ndarray: Predictions in the order of df
+        """
+        assigned = self.assign(df)
+        predictions = np.empty(len(df), dtype=float)
+        counts = {}
+        for i in np.unique(assigned):
+            positions = np.flatnonzero(assigned == i)
+            if i == FALLBACK:
+                name, model = 'global', global_model
+            else:
+                name, model = self.routes[i].name, self.cache.get(self.routes[i].model_path)
+            subset = df if len(positions) == len(df) else df.iloc[positions]
+            predictions[positions] = model.predict(subset)
+            counts[name] = len(positions)
+        with self._lock:
+            for name, count in counts.items():
+                self.records[name] += count
+        return predictions
+
+    def stats(self):
+        """Records served per route and the model cache state."""
+        with self._lock:
+            records = dict(self.records)
+        return {'routes': len(self.routes), 'records': records, 'cache': self.cache.stats()}
+
+
+def load_routes(path, cache=None):
+    """
+    Build a router from a routes file.
+
+    The file holds {"routes": [{"name": ..., "model": ..., "when": {...}}]};
+    model paths are relative to the file's directory.
+
+    Args:
+        path (str): Path of the JSON routes file
+        cache (ModelCache): Model cache, a new one with the default budget if None
+
+    Returns:
+        ModelRouter: Router over the file's routes
+    """
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(path))
+        routes = [Route(entry.get('name', entry['model']), os.path.join(base_dir, entry['model']), entry['when'])
+                  for entry in config['routes']]
+    except Exception as e:
+        raise Exception(f"Error loading model routes: {str(e)}")
+    return ModelRouter(routes, cache)
+
+
+def get_router():
+    """
+    Router of this process, built on first use.
+
+    Returns:
+        ModelRouter: Router, or None if there is no routes file
+    """
+    global _router
+
+    if _router is None and os.path.exists(MODEL_ROUTES_PATH):
+        _router = load_routes(MODEL_ROUTES_PATH)
+    return _router
@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+import joblib
+import logging
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+# Shadow scoring settings: the candidate model is only loaded if its file exists
+SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'model', 'shadow_model.pkl'))
+# Share of requests also scored by the shadow model
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1))
+# Records buffered or being scored before new requests are skipped
+SHADOW_MAX_PENDING = int(os.environ.get('SHADOW_MAX_PENDING', 1000))
+# Sampled records are sent to the worker in batches of this size, or every SHADOW_FLUSH_SECONDS
+SHADOW_BATCH_SIZE = int(os.environ.get('SHADOW_BATCH_SIZE', 32))
+SHADOW_FLUSH_SECONDS = float(os.environ.get('SHADOW_FLUSH_SECONDS', 1.0))
+# Recent comparisons kept for the report
+SHADOW_WINDOW = int(os.environ.get('SHADOW_WINDOW', 10000))
+
+# Cache the scorer of this process, and the shadow model of the worker process
+_shadow_scorer = None
+_shadow_models = {}
+
+
+def _init_worker():
+    """Run the shadow worker at a lower CPU priority than the serving process."""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _score_shadow(model_path, records):
+    """
+    Score records with the shadow model, in the worker process.
+
+    Returns:
+        tuple: (predictions, seconds spent predicting)
+    """
+    model = _shadow_models.get(model_path)
+    if model is None:
+        model = _shadow_models[model_path] = joblib.load(model_path)
+    df = pd.DataFrame(records)
+    start = time.perf_counter()
+    predictions = model.predict(df)
+    return np.asarray(predictions, dtype=float).tolist(), time.perf_counter() - start
+
+
+def _percentile(values, q):
+    """Percentile of a possibly empty sequence."""
+    return float(np.percentile(values, q)) if len(values) else None
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live requests with a candidate model, off the serving path.
+
+    Requests are handed over once their response has been sent. Sampled
+    records are buffered and sent in batches to a separate, lower-priority
+    process, so the shadow model never holds the serving process's GIL or
+    delays a response, and inter-process traffic stays low. When the worker
+    falls behind by max_pending records, new requests are skipped rather
+    than queued.
+    """
+
+    def __init__(self, model_path=SHADOW_MODEL_PATH, sample_rate=SHADOW_SAMPLE_RATE,
+                 max_pending=SHADOW_MAX_PENDING, batch_size=SHADOW_BATCH_SIZE,
+                 flush_seconds=SHADOW_FLUSH_SECONDS, window=SHADOW_WINDOW):
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.sampled = 0
+        self.skipped = 0
+        self.completed = 0
+        self.errors = 0
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffer_latencies = []
+        # Per record: primary - shadow prediction; per request or batch: latencies
+        self.differences = deque(maxlen=window)
+        self.primary_latencies = deque(maxlen=window)
+        self.shadow_latencies = deque(maxlen=window)
+        self.shadow_batch_sizes = deque(maxlen=window)
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker)
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, args=(flush_seconds,),
+                                         name='shadow-flusher', daemon=True)
+        self._flusher.start()
+
+    def submit(self, data, primary_predictions, primary_seconds):
+        """
+        Queue a sampled request for shadow scoring.
+
+        Args:
+            data (dict or DataFrame): Preprocessed inputs of the request
+            primary_predictions (float or list): Predictions served to the client
+            primary_seconds (float): Time the primary model took
+        """
+        if random.random() >= self.sample_rate:
+            return
+        records = [data] if isinstance(data, dict) else data.to_dict('records')
+        if not isinstance(primary_predictions, list):
+            primary_predictions = [primary_predictions]
+        with self._lock:
+            if self.pending + len(self._buffer) + len(records) > self.max_pending:
+                self.skipped += 1
+                return
+            self.sampled += 1
+            self._buffer.extend(zip(records, primary_predictions))
+            self._buffer_latencies.append(primary_seconds * 1000)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send the buffered records to the shadow worker."""
+        with self._lock:
+            batch, latencies = self._buffer, self._buffer_latencies
+            self._buffer, self._buffer_latencies = [], []
+            self.pending += len(batch)
+        if not batch:
+            return
+        records, primary_predictions = zip(*batch)
+        try:
+            future = self._executor.submit(_score_shadow, self.model_path, list(records))
+        except Exception as e:
+            with self._lock:
+                self.pending -= len(batch)
+                self.errors += 1
+            logger.warning(f"Error submitting shadow scoring: {str(e)}")
+            return
+        future.add_done_callback(partial(self._record, list(primary_predictions), latencies))
+
+    def _run_flusher(self, flush_seconds):
+        """Send partial batches at least every flush_seconds."""
+        while not self._closed.wait(flush_seconds):
+            self.flush()
+
+    def _record(self, primary_predictions, primary_latencies, future):
+        """Store the comparison of a finished shadow batch."""
+        with self._lock:
+            self.pending -= len(primary_predictions)
+            try:
+                shadow_predictions, shadow_seconds = future.result()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Error in shadow scoring: {str(e)}")
+                return
+            self.completed += len(primary_latencies)
+            self.differences.extend(np.subtract(primary_predictions, shadow_predictions).tolist())
+            self.primary_latencies.extend(primary_latencies)
+            self.shadow_latencies.append(shadow_seconds * 1000)
+            self.shadow_batch_sizes.append(len(primary_predictions))
+
+    def report(self):
+        """
+        Compare the shadow model with the primary one on the recent window.
+
+        Returns:
+            dict: Request counts, prediction differences (primary - shadow)
+            and latency percentiles in milliseconds: per request for the
+            primary model, per batch (and mean per record) for the shadow model
+        """
+        with self._lock:
+            differences = np.array(self.differences)
+            primary = list(self.primary_latencies)
+            shadow = list(self.shadow_latencies)
+            shadow_records = sum(self.shadow_batch_sizes)
+            counts = {'sampled': self.sampled, 'completed': self.completed,
+                      'pending_records': self.pending + len(self._buffer),
+                      'skipped': self.skipped, 'errors': self.errors}
+        absolute = np.abs(differences)
+        return {
+            'model_path': self.model_path,
+            'sample_rate': self.sample_rate,
+            'requests': counts,
+            'records_compared': int(len(differences)),
+            'differences': {
+                'mean': float(differences.mean()) if len(differences) else None,
+                'mean_absolute': float(absolute.mean()) if len(differences) else None,
+                'rmse': float(np.sqrt((differences ** 2).mean())) if len(differences) else None,
+                'p95_absolute': _percentile(absolute, 95),
+                'max_absolute': float(absolute.max()) if len(differences) else None
+            },
+            'latency_ms': {
+                'primary_p50': _percentile(primary, 50),
+                'primary_p95': _percentile(primary, 95),
+                'shadow_batch_p50': _percentile(shadow, 50),
+                'shadow_batch_p95': _percentile(shadow, 95),
+                'shadow_per_record_mean': sum(shadow) / shadow_records if shadow_records else None
+            }
+        }
+
+    def close(self):
+        """Stop the flusher and the worker process."""
+        self._closed.set()
+        self._executor.shutdown(wait=False)
+
+
+def get_shadow_scorer():
+    """
+    Shadow scorer of this process, started on first use.
+
+    Returns:
+        ShadowScorer: Scorer, or None if there is no shadow model file
+    """
+    global _shadow_scorer
+
+    if _shadow_scorer is None and os.path.exists(SHADOW_MODEL_PATH):
+        _shadow_scorer = ShadowScorer()
+    return _shadow_scorer
+
+
+def shadow_after_response(response, data, primary_predictions, primary_seconds):
+    """
+    Hand a request to the shadow scorer once its response has been sent.
+
+    Args:
+        response (Response): Response of the primary prediction
+        data (dict or DataFrame): Preprocessed inputs
+        primary_predictions (float or list): Predictions served to the client
+        primary_seconds (float): Time the primary model took
+    """
+    try:
+        scorer = get_shadow_scorer()
+        if scorer is not None and scorer.sample_rate > 0:
+            response.call_on_close(lambda: scorer.submit(data, primary_predictions, primary_seconds))
+    except Exception as e:
+        logger.warning(f"Error scheduling shadow scoring: {str(e)}")
@@ -0,0 +1,301 @@
+import numpy as np
+import pandas as pd
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Make the API modules and the API client importable when run as a script from anywhere
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.preprocess import preprocess_data
+from api.predict import predict_sales
+
+# Batch scoring settings
+SCORE_CHUNK_SIZE = int(os.environ.get('SCORE_CHUNK_SIZE', 50000))
+# Worker processes (-1 for all cores); 1 scores in this process
+SCORE_N_JOBS = int(os.environ.get('SCORE_N_JOBS', -1))
+# Seconds between progress lines
+SCORE_PROGRESS_SECONDS = float(os.environ.get('SCORE_PROGRESS_SECONDS', 5.0))
+# Score through the prediction API at PREDICTION_API_URL instead of loading the model
+SCORE_VIA_API = os.environ.get('SCORE_VIA_API', 'False') == 'True'
+
+PREDICTION_COLUMN = 'Prediction'
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet',
+           '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson'}
+
+
+def file_format(path):
+    """
+    Format of a data file, from its extension.
+
+    Args:
+        path (str): File path, optionally ending in .gz for CSV and NDJSON
+
+    Returns:
+        str: 'csv', 'parquet' or 'ndjson'
+    """
+    root, extension = os.path.splitext(path.lower())
+    if extension == '.gz':
+        extension = os.path.splitext(root)[1]
+    if extension not in FORMATS:
+        raise Exception(f"Unknown file format of {path}, expected one of {sorted(FORMATS)}")
+    return FORMATS[extension]
+
+
+def read_chunks(path, chunk_size=SCORE_CHUNK_SIZE):
+    """
+    Read a CSV, Parquet or NDJSON file in chunks of chunk_size rows.
+
+    Args:
+        path (str): Input file
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        DataFrame: Consecutive chunks, the same ones on every read
+    """
+    fmt = file_format(path)
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif fmt == 'ndjson':
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    else:
+        if pyarrow is None:
+            raise Exception("Reading Parquet requires pyarrow")
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+def _init_worker():
+    """Keep each worker on one core; the pool provides the parallelism."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def score_chunk(index, chunk, fmt):
+    """
+    Score one chunk and serialize it with its predictions, typically in a worker process.
+
+    The model is loaded once per process by predict_sales and reused. With
+    SCORE_VIA_API the chunk is sent to the API instead, in batch requests over
+    the process's pooled client.
+
+    Args:
+        index (int): Position of the chunk in the input
+        chunk (DataFrame): Input rows
+        fmt (str): Output format
+
+    Returns:
+        tuple: (index, rows, serialized output)
+    """
+    if SCORE_VIA_API:
+        from client import get_client
+        predictions, _ = get_client().predict_many(chunk)
+    else:
+        predictions, _ = predict_sales(preprocess_data(chunk))
+    chunk = chunk.copy()
+    chunk[PREDICTION_COLUMN] = np.atleast_1d(np.asarray(predictions, dtype=float))
+    if fmt == 'csv':
+        data = chunk.to_csv(index=False, header=index == 0).encode('utf-8')
+    elif fmt == 'ndjson':
+        text = chunk.to_json(orient='records', lines=True, double_precision=15)
+        data = (text if text.endswith('\n') else text + '\n').encode('utf-8')
+    else:
+        buffer = io.BytesIO()
+        chunk.to_parquet(buffer, index=False)
+        data = buffer.getvalue()
+    return index, len(chunk), data
+
+
+def _input_identity(path, chunk_size, fmt):
+    """What a checkpoint must match to be resumed."""
+    stat = os.stat(path)
+    return {'input': os.path.abspath(path), 'input_bytes': stat.st_size, 'input_mtime': stat.st_mtime,
+            'chunk_size': chunk_size, 'format': fmt}
+
+
+def _part_path(output_path, index):
+    """Parquet output is a directory of one file per chunk, in input order."""
+    return os.path.join(output_path, f"part-{index:06d}.parquet")
+
+
+class _OrderedWriter:
+    """
+    Writes scored chunks in input order and records a checkpoint after each.
+
+    CSV and NDJSON go to one file whose length is checkpointed, so a resumed
+    run truncates whatever a crash left half-written. Parquet goes to one
+    file per chunk in a directory, as a Parquet file cannot be appended to.
+    """
+
+    def __init__(self, output_path, fmt, identity, restart):
+        self.output_path = output_path
+        self.fmt = fmt
+        self.identity = identity
+        self.checkpoint_path = output_path.rstrip(os.sep) + CHECKPOINT_SUFFIX
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.output_bytes = 0
+
+        checkpoint = None
+        if not restart and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if {key: checkpoint.get(key) for key in identity} != identity:
+                raise Exception(f"Checkpoint {self.checkpoint_path} belongs to another input or settings; "
+                                "remove it or restart")
+            self.chunks_done = checkpoint['chunks_done']
+            self.rows_done = checkpoint['rows_done']
+            self.output_bytes = checkpoint['output_bytes']
+
+        if fmt == 'parquet':
+            os.makedirs(output_path, exist_ok=True)
+            for name in os.listdir(output_path):
+                # Parts past the checkpoint (or all of them on a fresh run) are rewritten
+                if name.endswith('.tmp') or (name.startswith('part-') and int(name[5:11]) >= self.chunks_done):
+                    os.remove(os.path.join(output_path, name))
+            self.file = None
+        else:
+            self.file = open(output_path, 'r+b' if checkpoint is not None else 'wb')
+            self.file.truncate(self.output_bytes)
+            self.file.seek(self.output_bytes)
+
+    def write(self, rows, data):
+        """Write the next chunk in order and checkpoint it."""
+        if self.fmt == 'parquet':
+            path = _part_path(self.output_path, self.chunks_done)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+        else:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.chunks_done += 1
+        self.rows_done += rows
+        self.output_bytes += len(data)
+
+        checkpoint = dict(self.identity, chunks_done=self.chunks_done, rows_done=self.rows_done,
+                          output_bytes=self.output_bytes)
+        with open(self.checkpoint_path + '.tmp', 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+    def close(self, complete):
+        """Close the output; a complete run no longer needs its checkpoint."""
+        if self.file is not None:
+            self.file.close()
+        if complete and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+def score_file(input_path, output_path, chunk_size=SCORE_CHUNK_SIZE, n_jobs=SCORE_N_JOBS,
+               restart=False, progress=None):
+    """
+    Score a data file chunk by chunk on a pool of worker processes.
+
+    Chunks are scored out of order by the workers but written in input
+    order, with at most two chunks per worker in memory. After each chunk a
+    checkpoint is saved next to the output, and a later run with the same
+    input and chunk size resumes after the last written chunk.
+
+    Args:
+        input_path (str): CSV, Parquet or NDJSON input
+        output_path (str): Output file (CSV or NDJSON) or directory (Parquet),
+            the format taken from its extension
+        chunk_size (int): Rows per chunk
+        n_jobs (int): Worker processes, -1 for all cores, 1 to score in this process
+        restart (bool): Ignore an existing checkpoint and start over
+        progress (callable): Called with the stats dict from time to time
+
+    Returns:
+        dict: Rows scored, rows skipped on resume, seconds, rows per second and workers
+    """
+    fmt = file_format(output_path)
+    workers = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 1 else n_jobs
+    writer = _OrderedWriter(output_path, fmt, _input_identity(input_path, chunk_size, file_format(input_path)),
+                            restart)
+    resumed_rows = writer.rows_done
+    start = time.perf_counter()
+    last_progress = start
+
+    def stats():
+        seconds = time.perf_counter() - start
+        rows = writer.rows_done - resumed_rows
+        return {'rows': rows, 'resumed_rows': resumed_rows, 'seconds': seconds,
+                'rows_per_second': rows / seconds if seconds > 0 else 0.0, 'workers': workers}
+
+    def report():
+        nonlocal last_progress
+        if progress is not None and time.perf_counter() - last_progress >= SCORE_PROGRESS_SECONDS:
+            last_progress = time.perf_counter()
+            progress(stats())
+
+    # Chunks already in the output are read again but not scored
+    chunks = ((index, chunk) for index, chunk in enumerate(read_chunks(input_path, chunk_size))
+              if index >= writer.chunks_done)
+    complete = False
+    try:
+        if workers == 1:
+            for index, chunk in chunks:
+                _, rows, data = score_chunk(index, chunk, fmt)
+                writer.write(rows, data)
+                report()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                in_flight = {}
+                done = {}
+                for index, chunk in chunks:
+                    in_flight[index] = executor.submit(score_chunk, index, chunk, fmt)
+                    while len(in_flight) >= 2 * workers:
+                        _drain(in_flight, done, writer)
+                        report()
+                while in_flight:
+                    _drain(in_flight, done, writer)
+                    report()
+        complete = True
+    finally:
+        writer.close(complete)
+    return stats()
+
+
+def _drain(in_flight, done, writer):
+    """Wait for the next chunk in order, then write every finished chunk that follows it."""
+    if writer.chunks_done in in_flight:
+        in_flight[writer.chunks_done].result()
+    for index in [index for index, future in in_flight.items() if future.done()]:
+        _, rows, data = in_flight.pop(index).result()
+        done[index] = (rows, data)
+    while writer.chunks_done in done:
+        writer.write(*done.pop(writer.chunks_done))
+
+
+def _print_progress(stats):
+    """Print one progress line."""
+    print(f"  {stats['rows']:>12} rows  {stats['rows_per_second']:>10.0f} rows/s")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python score_batch.py <input .csv|.parquet|.ndjson> <output .csv|.parquet|.ndjson> "
+                 "[--restart]")
+    input_path, output_path = sys.argv[1], sys.argv[2]
+    print(f"Scoring {input_path} into {output_path} in chunks of {SCORE_CHUNK_SIZE} rows...")
+    result = score_file(input_path, output_path, restart='--restart' in sys.argv[3:],
+                        progress=_print_progress)
+    if result['resumed_rows']:
+        print(f"Resumed after {result['resumed_rows']} rows already scored")
+    print(f"Scored {result['rows']} rows in {result['seconds']:.1f}s with {result['workers']} workers: "
+          f"{result['rows_per_second']:.0f} rows/s")
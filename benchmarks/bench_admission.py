@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+os.environ.setdefault('PREDICTION_LOG_ENABLED', 'False')
+
+# Add the repository root and backend to path for the app
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
+from backend.app import app
+from api.utils import get_sample_data
+from api.admission import admission_stats
+
+# A burst of concurrent single predictions, with batch requests competing for the server
+BURST = int(os.environ.get('BENCH_BURST', 100))
+BATCHES = int(os.environ.get('BENCH_BATCHES', 4))
+BATCH_SIZE = int(os.environ.get('BENCH_BATCH_SIZE', 2000))
+
+record = get_sample_data()
+results = {'predict': [], 'predict/batch': []}
+lock = threading.Lock()
+
+
+def call(endpoint, payload):
+    """Send one request and record its status and latency."""
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post(f"/api/{endpoint}", json=payload)
+    with lock:
+        results[endpoint].append((response.status_code, (time.perf_counter() - start) * 1000))
+
+
+# Warm up the model
+app.test_client().post('/api/predict', json=record)
+
+threads = [threading.Thread(target=call, args=('predict/batch', [record] * BATCH_SIZE)) for _ in range(BATCHES)]
+threads += [threading.Thread(target=call, args=('predict', record)) for _ in range(BURST)]
+start = time.perf_counter()
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(f"Burst of {BURST} single and {BATCHES} batch requests served in {time.perf_counter() - start:.2f} s")
+
+print(f"  {'Endpoint':<16}{'200':>6}{'503':>6}{'p50 200 (ms)':>14}{'p95 200 (ms)':>14}{'max 503 (ms)':>14}")
+for endpoint, calls in results.items():
+    ok = [ms for status, ms in calls if status == 200]
+    shed = [ms for status, ms in calls if status == 503]
+    print(f"  {endpoint:<16}{len(ok):>6}{len(shed):>6}"
+          f"{np.percentile(ok, 50) if ok else float('nan'):>14.1f}{np.percentile(ok, 95) if ok else float('nan'):>14.1f}"
+          f"{max(shed) if shed else float('nan'):>14.1f}")
+
+for name, stats in admission_stats().items():
+    print(f"  {name}: admitted {stats['admitted']}, shed {stats['shed']}")
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+
+# Add the models directory to path for the artifact helpers
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+sys.path.append(MODELS_DIR)
+from artifact import serving_pipeline
+
+# Compare cold-start loading of a saved model (e.g. a pickled GridSearchCV)
+# with the slim serving artifact exported from it
+MODEL_PATH = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    os.path.dirname(MODELS_DIR), 'backend', 'model', 'sales_model.pkl')
+REPEATS = int(os.environ.get('BENCH_REPEATS', 5))
+
+# Each load runs in a fresh interpreter, as a new serving process would. The
+# libraries are imported first so only unpickling the artifact is measured.
+COLD_START = '''
+import sys, time
+sys.path.append(sys.argv[2])
+import joblib, numpy, pandas, sklearn
+from profiler import current_rss
+before = current_rss()
+start = time.perf_counter()
+model = joblib.load(sys.argv[1])
+seconds = time.perf_counter() - start
+print(seconds, (current_rss() - before) if before is not None else -1)
+'''
+
+
+def cold_start(path):
+    """Best load time and its resident size increase over REPEATS fresh processes."""
+    runs = []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, '-c', COLD_START, path, MODELS_DIR],
+                                check=True, capture_output=True, text=True).stdout.split()
+        runs.append((float(output[0]), int(output[1])))
+    return min(runs)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    model = joblib.load(MODEL_PATH)
+    slim = serving_pipeline(model)
+    artifacts = {f"Current ({type(model).__name__})": MODEL_PATH}
+    for level in (0, 3):
+        path = os.path.join(tmp, f"slim_{level}.pkl")
+        joblib.dump(slim, path, compress=level)
+        artifacts[f"Slim (compress={level})"] = path
+
+    print(f"Model: {MODEL_PATH}")
+    print(f"  {'':<32}{'Size (MB)':>11}{'Load (s)':>10}{'RSS (MB)':>10}")
+    for label, path in artifacts.items():
+        seconds, rss = cold_start(path)
+        rss_mb = f"{rss / 1024 ** 2:.1f}" if rss >= 0 else 'n/a'
+        print(f"  {label:<32}{os.path.getsize(path) / 1024 ** 2:>11.2f}{seconds:>10.4f}{rss_mb:>10}")
@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+import requests
+
+warnings.filterwarnings('ignore')
+os.environ.setdefault('PREDICTION_LOG_ENABLED', 'False')
+
+# Add the repository root and backend to path for the app and the client
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
+from werkzeug.serving import make_server
+from backend.app import app
+from api.utils import get_sample_data
+from client import LocalPredictor, PredictionClient
+
+# End-to-end latency of single predictions over HTTP: a bare requests.post
+# per call (a new connection each time) against the pooled client, called
+# in sequence and by concurrent threads, and in process without HTTP
+CALLS = int(os.environ.get('BENCH_CALLS', 200))
+THREADS = int(os.environ.get('BENCH_THREADS', 8))
+
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+server = make_server('127.0.0.1', 0, app, threaded=True)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_port}"
+# Distinct records, so the client's cache does not answer them
+records = [dict(get_sample_data(), **{'Item Weight': 5.0 + i / CALLS}) for i in range(CALLS)]
+
+
+def bare(record):
+    response = requests.post(f"{url}/api/predict", headers={"Content-Type": "application/json"},
+                             data=json.dumps(record))
+    return response.json()['prediction']
+
+
+def run(predict, threads):
+    """Milliseconds per call (p50, p95) and calls per second."""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(part):
+        for record in part:
+            start = time.perf_counter()
+            predict(record)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=worker, args=(records[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), len(latencies) / (time.perf_counter() - start)
+
+
+try:
+    bare(records[0])
+    print(f"{CALLS} single predictions over HTTP")
+    print(f"  {'Caller':<34}{'p50 (ms)':>10}{'p95 (ms)':>10}{'calls/s':>10}")
+    for threads in [1, THREADS]:
+        print(f"  {'requests.post, ' + str(threads) + ' thread(s)':<34}{'%10.1f%10.1f%10.0f' % run(bare, threads)}")
+        with PredictionClient(url) as client:
+            row = run(lambda record: client.predict(record), threads)
+            stats = client.stats()
+            print(f"  {'client, ' + str(threads) + ' thread(s)':<34}{'%10.1f%10.1f%10.0f' % row}"
+                  f"   {stats['requests']} requests")
+            row = run(lambda record: client.predict(record), threads)
+            print(f"  {'client, cached, ' + str(threads) + ' thread(s)':<34}{'%10.1f%10.1f%10.0f' % row}")
+        local = LocalPredictor()
+        print(f"  {'in-process, ' + str(threads) + ' thread(s)':<34}"
+              f"{'%10.1f%10.1f%10.0f' % run(lambda record: local.predict(record), threads)}")
+finally:
+    server.shutdown()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset import load_dataset, build_cache
+from generate_data import scaled_dataset
+
+# Compare parsing the CSV with loading the typed cache
+DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else scaled_dataset()
+REPEATS = int(os.environ.get('BENCH_REPEATS', 5))
+
+
+def best_of(load):
+    """Best wall time over REPEATS loads, with the last loaded frame."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        df = load()
+        times.append(time.perf_counter() - start)
+    return min(times), df
+
+
+csv_seconds, csv_df = best_of(lambda: pd.read_csv(DATA_PATH))
+
+start = time.perf_counter()
+build_cache(DATA_PATH)
+build_seconds = time.perf_counter() - start
+
+cache_seconds, cache_df = best_of(lambda: load_dataset(DATA_PATH))
+
+csv_mb = csv_df.memory_usage(deep=True).sum() / 1024 ** 2
+cache_mb = cache_df.memory_usage(deep=True).sum() / 1024 ** 2
+
+print(f"Dataset: {DATA_PATH} ({len(csv_df)} rows)")
+print(f"  {'':<22}{'Load (s)':>10}{'Memory (MB)':>14}")
+print(f"  {'CSV (pd.read_csv)':<22}{csv_seconds:>10.4f}{csv_mb:>14.2f}")
+print(f"  {'Typed cache':<22}{cache_seconds:>10.4f}{cache_mb:>14.2f}")
+print(f"  Cache build (one-off): {build_seconds:.4f}s")
+print(f"  Speed-up: {csv_seconds / cache_seconds:.1f}x, memory: {cache_mb / csv_mb * 100:.0f}% of CSV frame")
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import warnings
+
+warnings.filterwarnings('ignore')
+
+# Add the repository root and backend to path for the dataset layer and the API modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
+from dataset import load_dataset
+from generate_data import scaled_dataset
+from api.preprocess import preprocess_data
+from api.predict import predict_sales
+from api.drift import get_monitor
+
+# Cost of recording served inputs for drift monitoring, next to prediction latency
+DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else scaled_dataset()
+REPEATS = int(os.environ.get('BENCH_REPEATS', 1000))
+
+df = preprocess_data(load_dataset(DATA_PATH).head(1000))
+records = df.to_dict('records')
+monitor = get_monitor()
+if monitor is None:
+    sys.exit("The model manifest has no drift reference; run models/train_model.py first")
+
+start = time.perf_counter()
+for i in range(REPEATS):
+    monitor.update(records[i % len(records)])
+record_us = (time.perf_counter() - start) / REPEATS * 1e6
+
+batch_seconds = []
+for _ in range(5):
+    start = time.perf_counter()
+    monitor.update(df)
+    batch_seconds.append(time.perf_counter() - start)
+batch_us = min(batch_seconds) / len(df) * 1e6
+
+start = time.perf_counter()
+monitor.report()
+report_ms = (time.perf_counter() - start) * 1000
+
+predict_sales(records[0])
+start = time.perf_counter()
+for record in records[:50]:
+    predict_sales(record)
+predict_us = (time.perf_counter() - start) / 50 * 1e6
+
+print(f"  Record one request:      {record_us:>10.1f} us ({record_us / predict_us:.2%} of a prediction)")
+print(f"  Record a batch, per row: {batch_us:>10.2f} us")
+print(f"  Single prediction:       {predict_us:>10.1f} us")
+print(f"  Drift report:            {report_ms:>10.2f} ms")
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import warnings
+
+warnings.filterwarnings('ignore')
+
+# Add the repository root and backend to path for the dataset layer and the API modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
+from dataset import load_dataset
+from generate_data import scaled_dataset
+from api.preprocess import preprocess_data
+from api.predict import predict_sales
+from api.explain import explain_sales
+
+# Compare explanation latency with prediction latency at several batch sizes
+DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else scaled_dataset()
+BATCH_SIZES = [1, 10, 100, 1000]
+REPEATS = int(os.environ.get('BENCH_REPEATS', 5))
+
+
+def best_of(function, data):
+    """Best wall time over REPEATS calls."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(data)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+df = preprocess_data(load_dataset(DATA_PATH).head(max(BATCH_SIZES)))
+# Warm up the model and the explainer's leaf table
+explain_sales(df.head(2))
+
+print(f"  {'Rows':>6}{'Predict (ms)':>14}{'Explain (ms)':>14}{'Ratio':>8}")
+for size in BATCH_SIZES:
+    batch = df.iloc[0].to_dict() if size == 1 else df.head(size)
+    predict_seconds = best_of(predict_sales, batch)
+    explain_seconds = best_of(explain_sales, batch)
+    print(f"  {size:>6}{predict_seconds * 1000:>14.2f}{explain_seconds * 1000:>14.2f}"
+          f"{explain_seconds / predict_seconds:>8.1f}")
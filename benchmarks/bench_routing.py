@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+warnings.filterwarnings('ignore')
+
+# Add the repository root and backend to path for the dataset layer and the API modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
+from dataset import load_dataset
+from generate_data import scaled_dataset
+from api.preprocess import preprocess_data
+from api.predict import _load_model, model_path
+from api.routing import ModelCache, load_routes, model_bytes
+
+# Cost of routing mixed batches over dozens of segment models (one copy of the
+# global model per Outlet Type and Item Type), with all models resident and
+# with a budget holding only a quarter of them
+DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else scaled_dataset()
+BATCH_SIZE = int(os.environ.get('BENCH_BATCH_SIZE', 1000))
+REPEATS = int(os.environ.get('BENCH_REPEATS', 20))
+
+model, features = _load_model()
+df = preprocess_data(load_dataset(DATA_PATH).head(BATCH_SIZE))
+X = df[features['categorical_features'] + features['numerical_features']]
+
+tmp = tempfile.mkdtemp()
+try:
+    segments = X[['Outlet Type', 'Item Type']].drop_duplicates().values.tolist()
+    routes = []
+    for i, (outlet_type, item_type) in enumerate(segments):
+        shutil.copyfile(model_path, os.path.join(tmp, f"segment-{i}.pkl"))
+        routes.append({'name': f"segment-{i}", 'model': f"segment-{i}.pkl",
+                       'when': {'Outlet Type': outlet_type, 'Item Type': item_type}})
+    routes_path = os.path.join(tmp, 'routes.json')
+    with open(routes_path, 'w') as f:
+        json.dump({'routes': routes}, f)
+    size = model_bytes(model)
+
+
+    def timed(predict):
+        """Mean milliseconds per batch."""
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            predict()
+        return (time.perf_counter() - start) / REPEATS * 1000
+
+
+    print(f"{len(routes)} segment models of {size / 1024:.0f} KiB, batches of {len(X)} rows")
+    print(f"  {'Serving':<28}{'ms/batch':>10}{'loads':>8}{'evictions':>11}")
+    print(f"  {'global model only':<28}{timed(lambda: model.predict(X)):>10.1f}{'':>8}{'':>11}")
+    for label, budget in [('routed, all resident', size * len(routes)),
+                          ('routed, 1/4 resident', size * len(routes) // 4)]:
+        router = load_routes(routes_path, ModelCache(max_bytes=budget))
+        router.predict(X, model)
+        ms = timed(lambda: router.predict(X, model))
+        stats = router.cache.stats()
+        print(f"  {label:<28}{ms:>10.1f}{stats['misses']:>8}{stats['evictions']:>11}")
+finally:
+    shutil.rmtree(tmp)
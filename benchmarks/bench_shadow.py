@@ -0,0 +1,77 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Primary request latency with shadow scoring off and on, in alternating rounds
+REQUESTS = int(os.environ.get('BENCH_REQUESTS', 50))
+ROUNDS = int(os.environ.get('BENCH_ROUNDS', 4))
+
+
+def serve(client, record, n):
+    """Client-side latency of n sequential prediction requests, in milliseconds."""
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = client.post('/api/predict', json=record)
+        response.close()  # Hands the request to the shadow worker
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def wait_for_shadow(scorer):
+    """Wait until the shadow worker has caught up."""
+    scorer.flush()
+    while scorer.report()['requests']['pending_records']:
+        time.sleep(0.1)
+
+
+# The shadow worker is a spawned process that re-imports this script
+if __name__ == '__main__':
+    # Shadow-score a copy of the served model
+    tmp = tempfile.mkdtemp()
+    os.environ['SHADOW_MODEL_PATH'] = os.path.join(tmp, 'shadow_model.pkl')
+    os.environ.setdefault('PREDICTION_LOG_ENABLED', 'False')
+    shutil.copyfile(os.path.join(ROOT, 'backend', 'model', 'sales_model.pkl'), os.environ['SHADOW_MODEL_PATH'])
+
+    # Add the repository root and backend to path for the app
+    sys.path.append(ROOT)
+    sys.path.append(os.path.join(ROOT, 'backend'))
+    from backend.app import app
+    from api.utils import get_sample_data
+    from api.shadow import get_shadow_scorer
+
+    client = app.test_client()
+    scorer = get_shadow_scorer()
+    record = get_sample_data()
+
+    # Warm up the primary model and start the shadow worker
+    scorer.sample_rate = 1.0
+    serve(client, record, 5)
+    wait_for_shadow(scorer)
+
+    latencies = {0.0: [], 1.0: []}
+    for _ in range(ROUNDS):
+        for rate in latencies:
+            scorer.sample_rate = rate
+            latencies[rate].extend(serve(client, record, REQUESTS))
+            wait_for_shadow(scorer)
+
+    print(f"  {'Shadow sample rate':<20}{'p50 (ms)':>10}{'p95 (ms)':>10}{'mean (ms)':>11}")
+    for rate, values in latencies.items():
+        print(f"  {rate:<20}{np.percentile(values, 50):>10.2f}{np.percentile(values, 95):>10.2f}"
+              f"{np.mean(values):>11.2f}")
+
+    report = scorer.report()
+    print(f"\nShadow requests: {report['requests']}")
+    print(f"Shadow model latency per batch p50: {report['latency_ms']['shadow_batch_p50']:.2f} ms, "
+          f"per record: {report['latency_ms']['shadow_per_record_mean']:.2f} ms")
+    scorer.close()
+    shutil.rmtree(tmp)
@@ -0,0 +1,568 @@
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# Client settings
+PREDICTION_API_URL = os.environ.get('PREDICTION_API_URL', 'http://localhost:5000')
+CLIENT_CONNECT_TIMEOUT = float(os.environ.get('CLIENT_CONNECT_TIMEOUT', 3.0))
+CLIENT_READ_TIMEOUT = float(os.environ.get('CLIENT_READ_TIMEOUT', 30.0))
+# Keep-alive connections kept open to the API
+CLIENT_POOL_SIZE = int(os.environ.get('CLIENT_POOL_SIZE', 10))
+# Retries of a failed request, waiting CLIENT_BACKOFF_SECONDS * 2^attempt (jittered) or the server's Retry-After
+CLIENT_RETRIES = int(os.environ.get('CLIENT_RETRIES', 3))
+CLIENT_BACKOFF_SECONDS = float(os.environ.get('CLIENT_BACKOFF_SECONDS', 0.2))
+# Records per batch request, at most the server's BATCH_MAX_RECORDS
+CLIENT_BATCH_SIZE = int(os.environ.get('CLIENT_BATCH_SIZE', 1000))
+# How long single predictions wait for others to share their request; with 0 they are
+# only combined while an earlier request is in flight
+CLIENT_BATCH_WAIT_MS = float(os.environ.get('CLIENT_BATCH_WAIT_MS', 0))
+# Responses remembered per record, and for how long
+CLIENT_CACHE_SIZE = int(os.environ.get('CLIENT_CACHE_SIZE', 4096))
+CLIENT_CACHE_SECONDS = float(os.environ.get('CLIENT_CACHE_SECONDS', 300))
+# Rows of a CSV read, checked and scored at a time by score_csv
+CLIENT_CSV_CHUNK_ROWS = int(os.environ.get('CLIENT_CSV_CHUNK_ROWS', 5000))
+
+# Statuses worth retrying: shed by admission control, or a proxy in front of a restarting server
+RETRY_STATUSES = (429, 502, 503, 504)
+DEADLINE_HEADER = 'X-Request-Deadline'
+# Columns the model needs; Item Identifier Prefix can also be derived from Item Identifier
+INPUT_COLUMNS = ['Item Fat Content', 'Item Type', 'Outlet Identifier', 'Outlet Size', 'Outlet Location Type',
+                 'Outlet Type', 'Item Identifier Prefix', 'Outlet Establishment Year', 'Item Visibility',
+                 'Item Weight', 'Rating']
+NUMERIC_COLUMNS = ['Outlet Establishment Year', 'Item Visibility', 'Item Weight', 'Rating']
+PREDICTION_COLUMN = 'Prediction'
+# Row numbers kept per column and kind of problem
+EXAMPLE_ROWS = 5
+
+# Cache the client of this process
+_client = None
+_client_lock = threading.Lock()
+
+
+class APIError(Exception):
+    """A request the prediction API failed or rejected."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _json_default(value):
+    """Encode numpy scalars, which records read with pandas often hold."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode(record):
+    """Canonical JSON of a record: its cache key and its part of a request body."""
+    return json.dumps(record, sort_keys=True, default=_json_default)
+
+
+def _records(data):
+    """Records of a list of dicts or a DataFrame, with missing values as null."""
+    if hasattr(data, 'to_dict'):
+        return data.astype(object).where(data.notnull(), None).to_dict('records')
+    return list(data)
+
+
+def missing_columns(columns):
+    """Input columns the model needs that a table lacks."""
+    missing = [col for col in INPUT_COLUMNS if col not in columns]
+    if 'Item Identifier Prefix' in missing and 'Item Identifier' in columns:
+        missing.remove('Item Identifier Prefix')
+    return missing
+
+
+def check_records(df, first_row=1, known=None):
+    """
+    Find values the API would not score as given.
+
+    The API fills blank values with training defaults and replaces numeric
+    values it cannot parse the same way, and the model has never seen
+    categories outside the known ones, so such rows are scored but worth a
+    look.
+
+    Args:
+        df (DataFrame): Records
+        first_row (int): Row number of the first record, for reporting
+        known (dict): Categorical column -> known values
+
+    Returns:
+        dict: (column, problem) -> {'count': rows, 'rows': first row numbers},
+            problem being 'blank', 'not a number' or 'unknown value'
+    """
+    issues = {}
+
+    def add(column, problem, mask):
+        positions = np.flatnonzero(np.asarray(mask))
+        if len(positions):
+            issues[(column, problem)] = {'count': int(len(positions)),
+                                         'rows': [int(first_row + i) for i in positions[:EXAMPLE_ROWS]]}
+
+    for column in [col for col in INPUT_COLUMNS if col in df.columns]:
+        blank = df[column].isnull()
+        add(column, 'blank', blank)
+        if column in NUMERIC_COLUMNS:
+            add(column, 'not a number', pd.to_numeric(df[column], errors='coerce').isnull() & ~blank)
+        elif known and column in known:
+            add(column, 'unknown value', ~df[column].isin(known[column]) & ~blank)
+    return issues
+
+
+def merge_issues(issues, more):
+    """Add the issues of a later chunk to those found so far."""
+    for key, issue in more.items():
+        if key in issues:
+            issues[key]['count'] += issue['count']
+            issues[key]['rows'] = (issues[key]['rows'] + issue['rows'])[:EXAMPLE_ROWS]
+        else:
+            issues[key] = dict(issue)
+    return issues
+
+
+class _ResponseCache:
+    """Least recently used responses, each valid for a fixed number of seconds."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expiry, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value of a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Remember a value, evicting the least recently used beyond the size limit."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every response, e.g. after a model deployment."""
+        with self._lock:
+            self._entries.clear()
+
+
+class _CSVScorer:
+    """Scoring of CSV files on top of a predict_many method."""
+
+    def score_csv(self, source, destination, chunk_size=CLIENT_CSV_CHUNK_ROWS, known=None, compress=False,
+                  progress=None):
+        """
+        Score a CSV file chunk by chunk, writing each scored chunk as it is done.
+
+        Only one chunk is in memory at a time, whatever the size of the file.
+        Each chunk is checked with check_records, scored with predict_many
+        and appended to the output with a Prediction column.
+
+        Args:
+            source: Path or binary file object of the input CSV
+            destination (str): Path of the output CSV
+            chunk_size (int): Rows per chunk
+            known (dict): Categorical column -> known values, for check_records
+            compress (bool): Write the output gzip-compressed
+            progress (callable): Called with the stats dict after every chunk
+
+        Returns:
+            dict: Rows scored, seconds, rows per second and the issues found
+
+        Raises:
+            APIError: When the file lacks input columns
+            Exception: When scoring a chunk fails
+        """
+        start = time.perf_counter()
+        stats = {'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'issues': {}}
+        opener = gzip.open if compress else open
+        with opener(destination, 'wt', newline='') as output:
+            for index, chunk in enumerate(pd.read_csv(source, chunksize=chunk_size)):
+                if index == 0:
+                    missing = missing_columns(chunk.columns)
+                    if missing:
+                        raise APIError(f"Missing columns: {', '.join(missing)}")
+                merge_issues(stats['issues'], check_records(chunk, stats['rows'] + 1, known))
+                chunk[PREDICTION_COLUMN] = self.predict_many(chunk)[0]
+                chunk.to_csv(output, header=index == 0, index=False)
+
+                stats['rows'] += len(chunk)
+                stats['seconds'] = time.perf_counter() - start
+                stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+                if progress is not None:
+                    progress(stats)
+        return stats
+
+
+class PredictionClient(_CSVScorer):
+    """
+    Client of the prediction API over a pool of keep-alive connections.
+
+    Every request has connect and read timeouts and is retried with
+    exponential backoff on connection errors and on 429/502/503/504,
+    honouring the server's Retry-After. Predictions are cached per record.
+
+    Single predictions from concurrent callers (threads, or coroutines via
+    the async methods) are queued and sent together: one batcher thread
+    takes everything queued, up to batch_size records, as one batch
+    request, so predictions arriving while a request is in flight share the
+    next one. A lone prediction goes to /api/predict without waiting.
+    """
+
+    def __init__(self, base_url=PREDICTION_API_URL, timeout=(CLIENT_CONNECT_TIMEOUT, CLIENT_READ_TIMEOUT),
+                 retries=CLIENT_RETRIES, backoff_seconds=CLIENT_BACKOFF_SECONDS, pool_size=CLIENT_POOL_SIZE,
+                 batch_size=CLIENT_BATCH_SIZE, batch_wait_ms=CLIENT_BATCH_WAIT_MS,
+                 cache_size=CLIENT_CACHE_SIZE, cache_seconds=CLIENT_CACHE_SECONDS):
+        self.base_url = base_url.rstrip('/')
+        # (connect, read) seconds, or one value for both
+        self.timeout = tuple(timeout) if isinstance(timeout, (tuple, list)) else (timeout, timeout)
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.cache = _ResponseCache(cache_size, cache_seconds)
+        self.counts = {'requests': 0, 'retries': 0, 'failures': 0, 'batches': 0, 'batched_records': 0}
+        self._counts_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+        self._pending = []  # (key, future) of queued single predictions
+        self._pending_ready = threading.Condition()
+        self._batcher = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the batcher once the queued predictions are sent, and close the connections."""
+        with self._pending_ready:
+            self._closed = True
+            self._pending_ready.notify_all()
+        if self._batcher is not None:
+            self._batcher.join()
+        self.session.close()
+
+    def _count(self, **increments):
+        with self._counts_lock:
+            for name, increment in increments.items():
+                self.counts[name] += increment
+
+    def _request(self, method, path, body=None):
+        """
+        Send a request, retrying transient failures.
+
+        Args:
+            method (str): 'GET' or 'POST'
+            path (str): Endpoint path
+            body (str): JSON request body
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            APIError: When the API rejects the request or it still fails after the retries
+        """
+        # Let admission control shed the request rather than run it past our read timeout
+        headers = {DEADLINE_HEADER: str(self.timeout[1])}
+        for attempt in range(self.retries + 1):
+            self._count(requests=1)
+            retry_after = None
+            try:
+                response = self.session.request(method, self.base_url + path, data=body, headers=headers,
+                                                timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                try:
+                    error = response.json().get('error', response.text)
+                except ValueError:
+                    error = response.text
+                failure = APIError(f"Error from API ({response.status_code}): {error}", response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                failure = APIError(f"Error connecting to API: {str(e)}")
+            if attempt < self.retries:
+                self._count(retries=1)
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    # Full jitter, so clients shed together do not retry together
+                    delay = random.uniform(0, self.backoff_seconds * 2 ** attempt)
+                time.sleep(delay)
+        self._count(failures=1)
+        raise failure
+
+    def _post_batch(self, keys):
+        """Score encoded records with one request; cached results come back as given."""
+        if len(keys) == 1:
+            result = self._request('POST', '/api/predict', keys[0])
+            return [(result['prediction'], result['confidence'])]
+        result = self._request('POST', '/api/predict/batch', '[' + ','.join(keys) + ']')
+        self._count(batches=1, batched_records=len(keys))
+        return list(zip(result['predictions'], result['confidences']))
+
+    def _score(self, keys, cached=True):
+        """Results of encoded records, from the cache unless already missed there, or scored batch_size at a time."""
+        results = [self.cache.get(('predict', key)) if cached else None for key in keys]
+        # Each distinct missing record is sent once
+        missing = list(OrderedDict.fromkeys(key for key, result in zip(keys, results) if result is None))
+        scored = {}
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            for key, result in zip(batch, self._post_batch(batch)):
+                scored[key] = result
+                self.cache.put(('predict', key), result)
+        return [result if result is not None else scored[key] for key, result in zip(keys, results)]
+
+    def predict(self, record):
+        """
+        Predict the sales of one record, sharing a request with concurrent callers.
+
+        Args:
+            record (dict): Input features, as accepted by /api/predict
+
+        Returns:
+            tuple: (prediction, confidence)
+        """
+        return self.submit(record).result()
+
+    def predict_many(self, records):
+        """
+        Predict many records with batch requests of batch_size records.
+
+        Args:
+            records: List of dicts or a DataFrame of input features
+
+        Returns:
+            tuple: (predictions, confidences) as lists in input order
+        """
+        results = self._score([_encode(record) for record in _records(records)])
+        return [result[0] for result in results], [result[1] for result in results]
+
+    def submit(self, record):
+        """
+        Queue one record for the batcher.
+
+        Returns:
+            Future: Resolves to (prediction, confidence)
+        """
+        key = _encode(record)
+        future = Future()
+        cached = self.cache.get(('predict', key))
+        if cached is not None:
+            future.set_result(cached)
+            return future
+        with self._pending_ready:
+            if self._closed:
+                raise APIError("Client is closed")
+            self._pending.append((key, future))
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run_batcher, name='prediction-client-batcher',
+                                                 daemon=True)
+                self._batcher.start()
+            self._pending_ready.notify()
+        return future
+
+    def _run_batcher(self):
+        """Send queued single predictions as batches until the client is closed."""
+        while True:
+            with self._pending_ready:
+                while not self._pending and not self._closed:
+                    self._pending_ready.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.batch_wait_ms / 1000
+                while len(self._pending) < self.batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_ready.wait(remaining)
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+            try:
+                # Queued records already missed the cache in submit
+                results = self._score([key for key, _ in batch], cached=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+    def explain(self, record):
+        """
+        Per-feature contributions to the prediction of one record.
+
+        Returns:
+            dict: Response of /api/explain
+        """
+        key = _encode(record)
+        result = self.cache.get(('explain', key))
+        if result is None:
+            result = self._request('POST', '/api/explain', key)
+            self.cache.put(('explain', key), result)
+        return result
+
+    def item_types(self):
+        """Item types the API knows."""
+        return self._get_cached('/api/item-types')['item_types']
+
+    def outlet_types(self):
+        """
+        Outlet attributes the API knows.
+
+        Returns:
+            tuple: (outlet types, outlet sizes, outlet locations)
+        """
+        result = self._get_cached('/api/outlet-types')
+        return result['outlet_types'], result['outlet_sizes'], result['outlet_locations']
+
+    def _get_cached(self, path):
+        result = self.cache.get(('GET', path))
+        if result is None:
+            result = self._request('GET', path)
+            self.cache.put(('GET', path), result)
+        return result
+
+    async def apredict(self, record):
+        """Async predict; concurrent coroutines share batch requests."""
+        return await asyncio.wrap_future(self.submit(record))
+
+    async def apredict_many(self, records):
+        """Async predict_many, run on the event loop's executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.predict_many, records)
+
+    async def aexplain(self, record):
+        """Async explain, run on the event loop's executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.explain, record)
+
+    def stats(self):
+        """Request, retry and batch counters and the cache hit rate."""
+        with self._counts_lock:
+            counts = dict(self.counts)
+        counts['cache'] = {'hits': self.cache.hits, 'misses': self.cache.misses}
+        return counts
+
+
+class LocalPredictor(_CSVScorer):
+    """
+    The API's preprocessing and model, called in this process.
+
+    Offers the prediction calls of PredictionClient without the HTTP round
+    trip, JSON encoding and Flask handling, for callers on the same host as
+    the model artifact. The artifact is loaded once, on creation. Predictions
+    made here do not reach the API's drift monitor, prediction log or shadow
+    model.
+    """
+
+    def __init__(self):
+        # The backend's modules, importable like in backend/score_batch.py
+        backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+        if backend_dir not in sys.path:
+            sys.path.append(backend_dir)
+        from api import explain, predict, preprocess, utils
+
+        if not os.path.exists(predict.model_path):
+            raise Exception(f"Model artifact not found at {predict.model_path}")
+        predict._load_model()
+        self._preprocess = preprocess.preprocess_data
+        self._predict = predict.predict_sales
+        self._explain = explain.explain_sales
+        self._utils = utils
+
+    def predict(self, record):
+        """
+        Predict the sales of one record.
+
+        Returns:
+            tuple: (prediction, confidence)
+        """
+        return self._predict(self._preprocess(dict(record)))
+
+    def predict_many(self, records):
+        """
+        Predict many records with one model call.
+
+        Returns:
+            tuple: (predictions, confidences) as lists in input order
+        """
+        df = pd.DataFrame(_records(records))
+        predictions, confidences = self._predict(self._preprocess(df))
+        if not isinstance(predictions, list):
+            predictions, confidences = [predictions], [confidences]
+        return predictions, confidences
+
+    def explain(self, record):
+        """
+        Per-feature contributions to the prediction of one record.
+
+        Returns:
+            dict: Same fields as the response of /api/explain
+        """
+        predictions, expected_values, contributions = self._explain(self._preprocess(dict(record)))
+        return {"success": True, "prediction": predictions[0], "expected_value": expected_values[0],
+                "contributions": contributions[0]}
+
+    def item_types(self):
+        """Item types the API knows."""
+        return list(self._utils.ITEM_TYPES)
+
+    def outlet_types(self):
+        """
+        Outlet attributes the API knows.
+
+        Returns:
+            tuple: (outlet types, outlet sizes, outlet locations)
+        """
+        return list(self._utils.OUTLET_TYPES), list(self._utils.OUTLET_SIZES), list(self._utils.OUTLET_LOCATIONS)
+
+
+def get_client():
+    """
+    Client of this process for PREDICTION_API_URL, created on first use.
+
+    Returns:
+        PredictionClient: Shared client
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = PredictionClient()
+        return _client
@@ -0,0 +1,237 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset import PROCESSED_DATA_PATH, dataset_hash
+
+SUMMARY_VERSION = 1
+# Columns the explorer can filter and group by; the summary holds one cell per combination present
+DRILL_DOWN_COLUMNS = ['Item Type', 'Item Fat Content', 'Outlet Identifier', 'Outlet Type',
+                      'Outlet Size', 'Outlet Location Type']
+HISTOGRAM_BINS = int(os.environ.get('SUMMARY_HISTOGRAM_BINS', 40))
+SUMMARY_CHUNK_SIZE = int(os.environ.get('SUMMARY_CHUNK_SIZE', 100000))
+# Rows shown as a sample of the data
+SAMPLE_ROWS = 10
+
+
+def summary_path(path=PROCESSED_DATA_PATH):
+    """Summary file next to a CSV."""
+    return os.path.splitext(path)[0] + '.summary.json'
+
+
+def _clean(chunk):
+    """Normalize the spellings the app normalizes, so each category is one cell."""
+    chunk['Item Fat Content'] = chunk['Item Fat Content'].replace(['LF', 'low fat', 'Low Fat'], 'Low Fat')
+    chunk['Item Fat Content'] = chunk['Item Fat Content'].replace(['reg', 'Regular'], 'Regular')
+    return chunk
+
+
+def _cells(chunk, dimensions):
+    """
+    Cell of each row of a chunk; every statistic is then one bincount over it.
+
+    Returns:
+        tuple: (cell per row, MultiIndex of the cells' drill-down values)
+    """
+    combined = np.zeros(len(chunk), dtype=np.int64)
+    labels = []
+    for col in dimensions:
+        codes, uniques = pd.factorize(chunk[col])
+        # Missing values get code -1, which indexes the appended 'Missing' label
+        label = np.append(np.asarray(uniques, dtype=object).astype(str), 'Missing')
+        combined = combined * len(label) + codes % len(label)
+        labels.append(label)
+    unique, cell = np.unique(combined, return_inverse=True)
+    values = []
+    for label in reversed(labels):
+        values.append(label[unique % len(label)])
+        unique = unique // len(label)
+    return cell.ravel(), pd.MultiIndex.from_arrays(values[::-1], names=dimensions)
+
+
+def build_summary(path=PROCESSED_DATA_PATH, chunk_size=SUMMARY_CHUNK_SIZE):
+    """
+    Precompute the Data Explorer's aggregates and save them next to the CSV.
+
+    The rows are reduced to one cell per combination of the drill-down
+    columns. Each cell holds its row count, per numeric column the count,
+    sum and histogram counts on fixed bins, and per pair of numeric columns
+    the moments of their jointly present values (centered on a per-column
+    shift for precision). Any filter on the drill-down columns is then a sum
+    over cells: group means, histograms and Pearson correlations come out
+    exactly without reading the rows. The CSV is read twice in chunks, once
+    for the bin ranges and once for the cells.
+
+    Args:
+        path (str): CSV path
+        chunk_size (int): Rows read at a time
+
+    Returns:
+        dict: The summary written
+    """
+    source_hash = dataset_hash(path)
+    sample = pd.read_csv(path, nrows=max(SAMPLE_ROWS, 1000))
+    columns = sample.columns.tolist()
+    ranges = {}
+    numeric_columns = sample.select_dtypes(include=[np.number]).columns.tolist()
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=numeric_columns):
+        for col in chunk.columns:
+            low, high = chunk[col].min(), chunk[col].max()
+            if pd.notnull(low):
+                old = ranges.get(col, (low, high))
+                ranges[col] = (min(old[0], low), max(old[1], high))
+    sample = sample.head(SAMPLE_ROWS)
+    numeric = [col for col in columns if col in ranges]
+    dimensions = [col for col in DRILL_DOWN_COLUMNS if col in columns]
+    edges = {col: np.linspace(low, high if high > low else low + 1, HISTOGRAM_BINS + 1)
+             for col, (low, high) in ranges.items()}
+    shifts = {col: (low + high) / 2 for col, (low, high) in ranges.items()}
+    pairs = list(itertools.combinations(numeric, 2))
+
+    frames = []
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk = _clean(chunk)
+        cell, index = _cells(chunk, dimensions)
+        n_cells = len(index)
+        parts = {'rows': np.bincount(cell, minlength=n_cells)}
+        centered = {col: (chunk[col] - shifts[col]).to_numpy(dtype=float) for col in numeric}
+        for col in numeric:
+            present = ~np.isnan(centered[col])
+            parts[f"{col}|n"] = np.bincount(cell[present], minlength=n_cells)
+            parts[f"{col}|sum"] = np.bincount(cell[present], weights=centered[col][present], minlength=n_cells)
+            bins = np.clip(np.searchsorted(edges[col], chunk[col].to_numpy(dtype=float)[present], side='right') - 1,
+                           0, HISTOGRAM_BINS - 1)
+            histogram = np.bincount(cell[present] * HISTOGRAM_BINS + bins,
+                                    minlength=n_cells * HISTOGRAM_BINS).reshape(n_cells, HISTOGRAM_BINS)
+            for b in range(HISTOGRAM_BINS):
+                parts[f"{col}|bin{b}"] = histogram[:, b]
+        for x, y in pairs:
+            both = ~np.isnan(centered[x]) & ~np.isnan(centered[y])
+            dx, dy, in_cell = centered[x][both], centered[y][both], cell[both]
+            parts[f"{x}|{y}|n"] = np.bincount(in_cell, minlength=n_cells)
+            for stat, weights in [('sx', dx), ('sy', dy), ('sxx', dx * dx), ('syy', dy * dy), ('sxy', dx * dy)]:
+                parts[f"{x}|{y}|{stat}"] = np.bincount(in_cell, weights=weights, minlength=n_cells)
+        frames.append(pd.DataFrame(parts, index=index))
+    cells = pd.concat(frames).groupby(level=dimensions, sort=True).sum().reset_index()
+
+    summary = {
+        'summary_version': SUMMARY_VERSION,
+        'source_hash': source_hash,
+        'rows': int(cells['rows'].sum()),
+        'columns': columns,
+        'sample': json.loads(sample.to_json(orient='records')),
+        'dimensions': dimensions,
+        'numeric': numeric,
+        'shifts': {col: float(shift) for col, shift in shifts.items()},
+        'bin_edges': {col: edge.tolist() for col, edge in edges.items()},
+        'cells': {col: cells[col].tolist() for col in cells.columns}
+    }
+    tmp_path = summary_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f, separators=(',', ':'))
+    os.replace(tmp_path, summary_path(path))
+    return summary
+
+
+def load_summary(path=PROCESSED_DATA_PATH):
+    """
+    Load the Data Explorer summary of a CSV, rebuilding it if the CSV changed.
+
+    Args:
+        path (str): CSV path
+
+    Returns:
+        DataSummary: Summary for the CSV's current content
+    """
+    try:
+        with open(summary_path(path), 'r') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        summary = None
+    if (summary is None or summary.get('summary_version') != SUMMARY_VERSION or
+            summary.get('source_hash') != dataset_hash(path)):
+        summary = build_summary(path)
+    return DataSummary(summary)
+
+
+class DataSummary:
+    """
+    Queries over a precomputed summary, each a sum over the cells a filter selects.
+    """
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.rows = summary['rows']
+        self.columns = summary['columns']
+        self.numeric = summary['numeric']
+        self.dimensions = summary['dimensions']
+        self.sample = pd.DataFrame(summary['sample'], columns=summary['columns'])
+        self.cells = pd.DataFrame(summary['cells'])
+
+    def categories(self, column):
+        """Values of a drill-down column, sorted."""
+        return sorted(self.cells[column].unique())
+
+    def select(self, filters=None):
+        """
+        Cells matching filters.
+
+        Args:
+            filters (dict): Drill-down column -> allowed values; empty or
+                missing columns are not filtered
+
+        Returns:
+            DataFrame: Selected cells
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, values in (filters or {}).items():
+            if values:
+                mask &= self.cells[column].isin(values).to_numpy()
+        return self.cells[mask]
+
+    def group_means(self, cells, by, column='Sales'):
+        """
+        Mean of a numeric column per value of a drill-down column.
+
+        Returns:
+            Series: Means, highest first
+        """
+        grouped = cells.groupby(by)[[f"{column}|sum", f"{column}|n"]].sum()
+        grouped = grouped[grouped[f"{column}|n"] > 0]
+        means = grouped[f"{column}|sum"] / grouped[f"{column}|n"] + self.summary['shifts'][column]
+        return means.sort_values(ascending=False)
+
+    def histogram(self, cells, column='Sales'):
+        """
+        Histogram of a numeric column on the summary's fixed bins.
+
+        Returns:
+            Series: Count per bin, indexed by the bin center
+        """
+        edges = np.asarray(self.summary['bin_edges'][column])
+        counts = cells[[f"{column}|bin{b}" for b in range(len(edges) - 1)]].sum().to_numpy()
+        return pd.Series(counts, index=np.round((edges[:-1] + edges[1:]) / 2, 4), name=column)
+
+    def correlation(self, cells):
+        """
+        Pearson correlations of the numeric columns over pairwise present values.
+
+        Returns:
+            DataFrame: Correlation matrix, like DataFrame.corr()
+        """
+        corr = pd.DataFrame(np.eye(len(self.numeric)), index=self.numeric, columns=self.numeric)
+        for x, y in itertools.combinations(self.numeric, 2):
+            n, sx, sy, sxx, syy, sxy = (cells[f"{x}|{y}|{stat}"].sum()
+                                        for stat in ['n', 'sx', 'sy', 'sxx', 'syy', 'sxy'])
+            denominator = np.sqrt(max(n * sxx - sx * sx, 0.0) * max(n * syy - sy * sy, 0.0))
+            corr.loc[x, y] = corr.loc[y, x] = (n * sxy - sx * sy) / denominator if denominator > 0 else np.nan
+        return corr
+
+
+if __name__ == '__main__':
+    summary = build_summary()
+    print(f"Summary of {summary['rows']} rows in {len(summary['cells']['rows'])} cells saved to "
+          f"{summary_path()} ({os.path.getsize(summary_path()) / 1024:.0f} KB)")
@@ -0,0 +1,207 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+PROCESSED_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'processed_data.csv')
+# Written by the backend's prediction logger
+PREDICTION_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prediction_logs')
+
+CATEGORICAL_COLUMNS = ['Item Fat Content', 'Item Identifier', 'Item Type', 'Outlet Identifier',
+                       'Outlet Location Type', 'Outlet Size', 'Outlet Type']
+TARGET_COLUMN = 'Sales'
+# Float columns keep float64 unless asked otherwise: models are trained on
+# these values and served float64 inputs. The target is never downcast.
+DOWNCAST_FLOATS = os.environ.get('DATASET_DOWNCAST_FLOATS', 'False') == 'True'
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Compute the SHA-256 of a file's content.
+
+    Args:
+        path (str): File path
+        block_size (int): Bytes read at a time
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(path):
+    """Cache file and its metadata sidecar for a CSV path."""
+    base = os.path.splitext(path)[0]
+    extension = '.feather' if CACHE_FORMAT == 'feather' else '.pkl'
+    return base + extension, base + '.cache.json'
+
+
+def _write_meta(meta_path, path, source_hash):
+    """Record the source hash along with the size and mtime it was computed for, atomically."""
+    stat = os.stat(path)
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'source_hash': source_hash,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'format': CACHE_FORMAT,
+            'downcast_floats': DOWNCAST_FLOATS
+        }, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _read_meta(meta_path):
+    """Read the cache metadata, or None if missing or unreadable."""
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def dataset_hash(path=PROCESSED_DATA_PATH):
+    """
+    Content hash of a dataset file.
+
+    The hash recorded with the cache is reused while the file's size and
+    modification time are unchanged, so callers don't re-read large files.
+
+    Args:
+        path (str): CSV path
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    _, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path)
+    stat = os.stat(path)
+    if meta and meta.get('size') == stat.st_size and meta.get('mtime') == stat.st_mtime:
+        return meta['source_hash']
+    return file_hash(path)
+
+
+def optimize_dtypes(df, downcast_floats=None):
+    """
+    Convert columns to compact dtypes.
+
+    Integer columns are downcast losslessly. Float columns other than the
+    target are only downcast to float32 when asked to.
+
+    Args:
+        df (DataFrame): Dataset as parsed from CSV
+        downcast_floats (bool): Downcast float features, DOWNCAST_FLOATS if None
+
+    Returns:
+        DataFrame: Same data with categorical and downcast numeric columns
+    """
+    if downcast_floats is None:
+        downcast_floats = DOWNCAST_FLOATS
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS or df[col].dtype == object:
+            df[col] = df[col].astype('category')
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(df[col]) and downcast_floats and col != TARGET_COLUMN:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+
+def build_cache(path=PROCESSED_DATA_PATH):
+    """
+    Parse the CSV and write its typed cache.
+
+    Args:
+        path (str): CSV path
+
+    Returns:
+        DataFrame: The typed dataset
+    """
+    cache_path, meta_path = _cache_paths(path)
+    source_hash = file_hash(path)
+
+    df = optimize_dtypes(pd.read_csv(path))
+    # Written aside and moved into place, so readers never see a partial cache
+    tmp_path = cache_path + '.tmp'
+    if CACHE_FORMAT == 'feather':
+        df.to_feather(tmp_path)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+    _write_meta(meta_path, path, source_hash)
+    return df
+
+
+def load_dataset(path=PROCESSED_DATA_PATH, use_cache=True):
+    """
+    Load the dataset through its typed cache, rebuilding it if the CSV changed.
+
+    Parsing the CSV infers every categorical column as object strings, which
+    is slow and memory hungry. The cache is a Feather file next to the CSV
+    (a pickle without pyarrow) holding categorical and downcast integer
+    dtypes, and is rebuilt whenever the CSV's content hash changes.
+
+    Args:
+        path (str): CSV path
+        use_cache (bool): Read and maintain the cache; False parses the CSV
+
+    Returns:
+        DataFrame: Dataset with categorical and compact integer dtypes
+    """
+    if not use_cache:
+        return optimize_dtypes(pd.read_csv(path))
+
+    cache_path, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path)
+    # Caches from before the float setting was recorded had their floats downcast
+    if (meta and meta.get('format') == CACHE_FORMAT and meta.get('downcast_floats', True) == DOWNCAST_FLOATS
+            and os.path.exists(cache_path)):
+        stat = os.stat(path)
+        if meta['source_hash'] == dataset_hash(path):
+            if (meta.get('size'), meta.get('mtime')) != (stat.st_size, stat.st_mtime):
+                # Touched but unchanged: remember the new stat to skip hashing next time
+                _write_meta(meta_path, path, meta['source_hash'])
+            if CACHE_FORMAT == 'feather':
+                return pd.read_feather(cache_path)
+            return pd.read_pickle(cache_path)
+    return build_cache(path)
+
+
+def load_prediction_logs(directory=PREDICTION_LOG_DIR):
+    """
+    Load the backend's prediction log files as one frame.
+
+    Rows hold the model's input columns, so with the realized Sales joined
+    in they can be used like the training data (e.g. by update_model.py).
+    Parquet files still being written are skipped.
+
+    Args:
+        directory (str): Prediction log directory
+
+    Returns:
+        DataFrame: Logged inputs with Prediction, Timestamp, Endpoint and
+        Model Version columns, oldest first
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, 'predictions-*'))):
+        if path.endswith('.ndjson.gz'):
+            frames.append(pd.read_json(path, lines=True, compression='gzip', dtype=False))
+        elif path.endswith('.parquet'):
+            frames.append(pd.read_parquet(path))
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
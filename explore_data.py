@@ -1,27 +1,231 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+import posixpath
+from xml.etree import ElementTree
+from openpyxl import load_workbook
+from data_summary import load_summary, summary_path
 
-# Load the dataset
+# Ingestion settings
 file_path = 'data/BlinkIT_Grocery_Data.xlsx'
-df = pd.read_excel(file_path)
+output_path = 'data/processed_data.csv'
+state_path = 'data/ingest_state.json'
+CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', 10000))
+FULL_REFRESH = '--full' in sys.argv
+# XML namespaces of the workbook part and its relationships
+SPREADSHEET_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+OFFICE_RELS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
 
-# Print basic information
-print(f"Dataset shape: {df.shape}")
-print("\nFirst 5 rows:")
-print(df.head())
 
-# Check for missing values
-print("\nMissing values by column:")
-print(df.isnull().sum())
+def sheet_signatures(path):
+    """
+    Cheap per-sheet change detection from the xlsx zip directory.
 
-# Get basic statistics
-print("\nBasic statistics:")
-print(df.describe())
+    Each sheet's part is found through the workbook relationships, and its
+    CRC and size are read without decompressing or parsing it, so unchanged
+    sheets can be skipped entirely.
 
-# Check column data types
-print("\nColumn data types:")
-print(df.dtypes)
+    Returns:
+        dict: Sheet title -> signature of its worksheet part
+    """
+    with zipfile.ZipFile(path) as archive:
+        workbook_xml = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        rels_xml = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels_xml.findall(f'{{{PACKAGE_RELS_NS}}}Relationship')}
+        signatures = {}
+        for sheet in workbook_xml.iter(f'{{{SPREADSHEET_NS}}}sheet'):
+            target = targets[sheet.get(f'{{{OFFICE_RELS_NS}}}id')]
+            # Targets are relative to xl/ unless they start at the package root
+            part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            info = archive.getinfo(part)
+            signatures[sheet.get('name')] = f"{info.CRC:08x}-{info.file_size}"
+        return signatures
 
-# Create a processed version
-df.to_csv('data/processed_data.csv', index=False)
-print("\nProcessed data saved to data/processed_data.csv") 
\ No newline at end of file
+
+def load_state(path=state_path):
+    """Load what previous runs ingested, or an empty state."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return empty_state()
+
+
+def empty_state():
+    """State of a run that ingested nothing yet."""
+    return {'sheets': {}, 'output_bytes': 0, 'header': None}
+
+
+def save_state(state, path=state_path):
+    """Persist the ingestion state, atomically."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def ingest(file_path=file_path, output_path=output_path, state_path=state_path, full_refresh=False,
+           chunk_rows=CHUNK_ROWS):
+    """
+    Ingest the workbook into the output CSV, appending only new rows.
+
+    Output rows are only appended while every previously ingested row range
+    is unchanged; a removed sheet, a changed header or a missing/truncated
+    output file means the CSV is rebuilt from scratch.
+
+    Args:
+        file_path (str): Source workbook
+        output_path (str): Output CSV
+        state_path (str): Ingestion state from previous runs
+        full_refresh (bool): Rebuild the output even if nothing changed
+        chunk_rows (int): Rows written per chunk
+
+    Returns:
+        dict: Rows ingested and parsed, whether the output was rebuilt, the
+        skipped sheets, the first chunk written, missing values per column
+        and the final state
+    """
+    state = load_state(state_path)
+    signatures = sheet_signatures(file_path)
+    run = {'new_rows': 0, 'parsed_rows': 0, 'rebuilt': False, 'skipped': [], 'first_chunk': None,
+           'missing': None}
+
+    # Read the workbook in read-only mode: rows are streamed from the sheet XML
+    # instead of building the whole workbook in memory
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+
+    def write_chunk(buffer, sheet, row_no, digest):
+        """Append a chunk of rows to the output and record the ingested range."""
+        chunk = pd.DataFrame(buffer, columns=state['header'])
+        write_header = state['output_bytes'] == 0
+        chunk.to_csv(output_path, mode='w' if write_header else 'a', header=write_header, index=False)
+
+        run['new_rows'] += len(chunk)
+        if run['first_chunk'] is None:
+            run['first_chunk'] = chunk
+        run['missing'] = chunk.isnull().sum() if run['missing'] is None else run['missing'] + chunk.isnull().sum()
+
+        state['sheets'][sheet] = {'rows': row_no, 'hash': digest.hexdigest()}
+        state['output_bytes'] = os.path.getsize(output_path)
+        save_state(state, state_path)
+
+    def ingest_sheets(rebuild):
+        """
+        Stream every changed sheet and append its new rows to the output.
+
+        Returns:
+            bool: False if an already ingested row range changed and a rebuild is needed
+        """
+        for ws in workbook.worksheets:
+            previous = state['sheets'].get(ws.title, {'rows': 0, 'hash': hashlib.sha1().hexdigest()})
+            if not rebuild and previous.get('signature') == signatures.get(ws.title):
+                run['skipped'].append(ws.title)
+                print(f"Sheet '{ws.title}': unchanged, skipped")
+                continue
+
+            rows = ws.iter_rows(values_only=True)
+            header = [str(h) for h in next(rows)]
+            if state['header'] is None:
+                state['header'] = header
+            elif header != state['header']:
+                if rebuild:
+                    raise Exception(f"Sheet '{ws.title}' has different columns than the first sheet")
+                return False
+
+            # Re-hash the rows ingested before to confirm they are an unchanged prefix
+            digest = hashlib.sha1()
+            ingested = previous['rows'] if not rebuild else 0
+            buffer = []
+            row_no = 0
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                digest.update(repr(row).encode('utf-8'))
+                row_no += 1
+                run['parsed_rows'] += 1
+                if row_no == ingested and digest.hexdigest() != previous['hash']:
+                    return False
+                if row_no <= ingested:
+                    continue
+
+                buffer.append(row)
+                if len(buffer) >= chunk_rows:
+                    write_chunk(buffer, ws.title, row_no, digest)
+                    buffer = []
+            if row_no < ingested:
+                # Rows were removed from the sheet
+                return False
+            if buffer or ws.title not in state['sheets']:
+                write_chunk(buffer, ws.title, row_no, digest)
+
+            state['sheets'][ws.title]['signature'] = signatures.get(ws.title)
+            save_state(state, state_path)
+            print(f"Sheet '{ws.title}': {row_no - ingested} new rows (rows {ingested + 1}-{row_no})")
+        return True
+
+    try:
+        rebuild = (
+            full_refresh
+            or not os.path.exists(output_path)
+            or os.path.getsize(output_path) < state['output_bytes']
+            or any(name not in signatures for name in state['sheets'])
+        )
+        if not rebuild:
+            # Drop anything written after the last recorded chunk (e.g. by an interrupted run)
+            with open(output_path, 'r+b') as f:
+                f.truncate(state['output_bytes'])
+
+        if rebuild:
+            print("Ingesting the whole workbook...")
+        elif not ingest_sheets(rebuild=False):
+            print("Previously ingested rows changed, rebuilding the whole output...")
+            rebuild = True
+        if rebuild:
+            state.clear()
+            state.update(empty_state())
+            run.update(new_rows=0, skipped=[], first_chunk=None, missing=None, rebuilt=True)
+            ingest_sheets(rebuild=True)
+    finally:
+        workbook.close()
+    run['state'] = state
+    return run
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    run = ingest(full_refresh=FULL_REFRESH)
+    elapsed = time.time() - start_time
+    first_chunk = run['first_chunk']
+
+    # Print basic information about the newly ingested rows
+    print(f"\nRows ingested this run: {run['new_rows']}")
+    print(f"Total rows in {output_path}: {sum(sheet['rows'] for sheet in run['state']['sheets'].values())}")
+    if first_chunk is not None:
+        print("\nFirst 5 rows:")
+        print(first_chunk.head())
+
+        # Check for missing values
+        print("\nMissing values by column (new rows):")
+        print(run['missing'])
+
+        # Get basic statistics
+        print("\nBasic statistics (first chunk):")
+        print(first_chunk.describe())
+
+        # Check column data types
+        print("\nColumn data types:")
+        print(first_chunk.dtypes)
+
+    parsed_rows = run['parsed_rows']
+    print(f"\nParsed {parsed_rows} rows in {elapsed:.2f}s ({parsed_rows / elapsed if elapsed else 0:.0f} rows/s)")
+    print(f"Processed data saved to {output_path}")
+
+    # Precompute the Data Explorer aggregates, unless they already match the data
+    load_summary(output_path)
+    print(f"Data Explorer summary saved to {summary_path(output_path)}")
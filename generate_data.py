@@ -0,0 +1,329 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from dataset import PROCESSED_DATA_PATH, dataset_hash
+
+SYNTHETIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'synthetic')
+# Scale of the synthetic dataset the benchmarks and out-of-core scripts use
+# instead of processed_data.csv; 0 uses the real data
+SYNTHETIC_SCALE = float(os.environ.get('SYNTHETIC_SCALE', 0))
+GEN_CHUNK_SIZE = int(os.environ.get('GEN_CHUNK_SIZE', 100000))
+GEN_SEED = int(os.environ.get('GEN_SEED', 42))
+GEN_NEW_OUTLETS = int(os.environ.get('GEN_NEW_OUTLETS', 0))
+GEN_NEW_ITEMS = int(os.environ.get('GEN_NEW_ITEMS', 0))
+
+OUTLET_KEY = 'Outlet Identifier'
+ITEM_KEY = 'Item Identifier'
+# Columns sampled within groups of another column, so their main dependence survives
+CONDITIONAL_ON = {'Sales': 'Outlet Type', 'Item Weight': 'Item Type', 'Item Fat Content': 'Item Type'}
+# Groups smaller than this use the column's overall distribution
+MIN_GROUP_ROWS = 30
+# Numeric columns with at most this many distinct values are sampled as discrete values
+DISCRETE_MAX_VALUES = 20
+# Points of each continuous column's quantile function
+QUANTILE_POINTS = 201
+
+
+def _decimals(values):
+    """Decimal places the values are recorded with, at most 6."""
+    for decimals in range(7):
+        if np.allclose(values, np.round(values, decimals)):
+            return decimals
+    return 6
+
+
+def _distribution(values):
+    """Distribution of one column (or one group of it), without its missing values."""
+    present = values.dropna()
+    if not pd.api.types.is_numeric_dtype(values) or present.nunique() <= DISCRETE_MAX_VALUES:
+        counts = present.value_counts(normalize=True)
+        return {'kind': 'discrete',
+                'values': [value.item() if hasattr(value, 'item') else value for value in counts.index],
+                'probabilities': counts.tolist()}
+    probabilities = np.linspace(0, 1, QUANTILE_POINTS)
+    return {'kind': 'continuous',
+            'quantiles': np.quantile(present.to_numpy(dtype=float), probabilities).tolist(),
+            'decimals': _decimals(present.to_numpy(dtype=float))}
+
+
+def learn_profile(df):
+    """
+    Learn what the generator needs from a dataset.
+
+    Outlets keep their attributes (every column constant within an outlet)
+    and their share of rows. Items keep their identifiers and frequencies.
+    Every other column gets its missing rate and either its value
+    frequencies (text and few-valued numeric columns) or its quantile
+    function, within the groups of CONDITIONAL_ON where it has one.
+
+    Args:
+        df (DataFrame): Source dataset
+
+    Returns:
+        dict: JSON-serializable profile
+    """
+    outlet_columns = [col for col in df.columns if col != OUTLET_KEY and
+                      (df.groupby(OUTLET_KEY, observed=True)[col].nunique(dropna=False) <= 1).all()]
+    outlets = df.groupby(OUTLET_KEY, observed=True)[outlet_columns].first()
+    outlet_shares = df[OUTLET_KEY].value_counts(normalize=True)
+    item_counts = df[ITEM_KEY].value_counts(normalize=True)
+
+    features = {}
+    for col in df.columns:
+        if col in (OUTLET_KEY, ITEM_KEY) or col in outlet_columns:
+            continue
+        feature = {'missing': float(df[col].isnull().mean()), 'overall': _distribution(df[col])}
+        group_col = CONDITIONAL_ON.get(col)
+        if group_col in df.columns:
+            feature['group_by'] = group_col
+            feature['groups'] = {str(group): _distribution(values)
+                                 for group, values in df.groupby(group_col, observed=True)[col]
+                                 if values.notnull().sum() >= MIN_GROUP_ROWS}
+        features[col] = feature
+
+    return {
+        'source_rows': int(len(df)),
+        'columns': [{'name': col, 'dtype': str(df[col].dtype)} for col in df.columns],
+        'outlets': {
+            'columns': outlet_columns,
+            'ids': [str(outlet) for outlet in outlets.index],
+            'attributes': json.loads(outlets.to_json(orient='values')),
+            'shares': [float(outlet_shares[outlet]) for outlet in outlets.index]
+        },
+        'items': {'ids': [str(item) for item in item_counts.index], 'shares': item_counts.tolist()},
+        'features': features
+    }
+
+
+def _new_outlets(profile, count, rng):
+    """Outlets with new identifiers and attributes drawn from the existing ones, with the mean share."""
+    outlets = profile['outlets']
+    ids, attributes, shares = list(outlets['ids']), list(outlets['attributes']), list(outlets['shares'])
+    numbers = [int(''.join(filter(str.isdigit, outlet)) or 0) for outlet in ids]
+    years = [row[outlets['columns'].index('Outlet Establishment Year')] for row in attributes] \
+        if 'Outlet Establishment Year' in outlets['columns'] else None
+    for k in range(count):
+        template = list(attributes[rng.integers(len(attributes))])
+        if years is not None:
+            template[outlets['columns'].index('Outlet Establishment Year')] = years[rng.integers(len(years))]
+        ids.append(f"OUT{max(numbers) + k + 1:03d}")
+        attributes.append(template)
+        shares.append(float(np.mean(outlets['shares'])))
+    return ids, attributes, np.asarray(shares) / np.sum(shares)
+
+
+def _new_items(profile, count, rng):
+    """Items with new identifiers under the existing prefixes, with the mean frequency."""
+    ids, shares = list(profile['items']['ids']), list(profile['items']['shares'])
+    prefixes = pd.Series([item[:2] for item in ids]).value_counts(normalize=True)
+    mean_share = float(np.mean(shares))
+    for k, prefix in enumerate(rng.choice(prefixes.index.to_numpy(), size=count, p=prefixes.to_numpy())):
+        ids.append(f"{prefix}N{k:04d}")
+        shares.append(mean_share)
+    return np.asarray(ids, dtype=object), np.asarray(shares) / np.sum(shares)
+
+
+def _sample(distribution, size, rng):
+    """Draw values from a learned distribution."""
+    if distribution['kind'] == 'discrete':
+        values = np.empty(len(distribution['values']), dtype=object)
+        values[:] = distribution['values']
+        return values[rng.choice(len(values), size=size, p=distribution['probabilities'])]
+    quantiles = distribution['quantiles']
+    values = np.interp(rng.random(size), np.linspace(0, 1, len(quantiles)), quantiles)
+    return np.round(values, distribution['decimals'])
+
+
+def generate_chunks(profile, rows, chunk_size=GEN_CHUNK_SIZE, seed=GEN_SEED, new_outlets=0, new_items=0):
+    """
+    Generate a synthetic dataset chunk by chunk.
+
+    Each chunk has its own random stream derived from the seed, so a
+    dataset is reproducible and memory stays bounded by one chunk.
+
+    Args:
+        profile (dict): Profile from learn_profile()
+        rows (int): Rows to generate
+        chunk_size (int): Rows per chunk
+        seed (int): Random seed
+        new_outlets (int): Outlets to add to the learned ones
+        new_items (int): Items to add to the learned ones
+
+    Yields:
+        DataFrame: Chunks with the source's columns, in its order and dtypes
+    """
+    setup = np.random.default_rng([seed, 0])
+    outlet_ids, outlet_attributes, outlet_shares = _new_outlets(profile, new_outlets, setup)
+    outlet_attributes = pd.DataFrame(outlet_attributes, columns=profile['outlets']['columns'])
+    item_ids, item_shares = _new_items(profile, new_items, setup)
+
+    for chunk_no, start in enumerate(range(0, rows, chunk_size)):
+        rng = np.random.default_rng([seed, chunk_no + 1])
+        size = min(chunk_size, rows - start)
+        outlet = rng.choice(len(outlet_ids), size=size, p=outlet_shares)
+        chunk = outlet_attributes.iloc[outlet].reset_index(drop=True)
+        chunk[OUTLET_KEY] = np.asarray(outlet_ids, dtype=object)[outlet]
+        chunk[ITEM_KEY] = item_ids[rng.choice(len(item_ids), size=size, p=item_shares)]
+
+        # Conditioning columns are sampled before the columns that depend on them
+        pending = [col for col in profile['features']]
+        while pending:
+            col = next(col for col in pending if profile['features'][col].get('group_by') not in pending)
+            pending.remove(col)
+            feature = profile['features'][col]
+            values = _sample(feature['overall'], size, rng)
+            if 'group_by' in feature:
+                groups = chunk[feature['group_by']].astype(str).to_numpy()
+                for group, distribution in feature['groups'].items():
+                    mask = groups == group
+                    if mask.any():
+                        values[mask] = _sample(distribution, int(mask.sum()), rng)
+            if feature['missing'] > 0:
+                values = values.astype(object if values.dtype == object else float)
+                values[rng.random(size) < feature['missing']] = None if values.dtype == object else np.nan
+            chunk[col] = values
+
+        columns = [column['name'] for column in profile['columns']]
+        chunk = chunk[columns]
+        for column in profile['columns']:
+            if column['dtype'] not in ('object', 'str', 'string', 'category'):
+                chunk[column['name']] = chunk[column['name']].astype(column['dtype'])
+        yield chunk
+
+
+def write_chunks(chunks, path):
+    """
+    Stream chunks to a CSV or Parquet file through a temporary file.
+
+    Args:
+        chunks (iterable): DataFrames with the same columns
+        path (str): Output path, .csv or .parquet
+
+    Returns:
+        int: Rows written
+    """
+    tmp_path = path + '.tmp'
+    rows = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            if path.endswith('.parquet'):
+                if pyarrow is None:
+                    raise Exception("Writing Parquet requires pyarrow")
+                table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def synthetic_dataset(scale, seed=GEN_SEED, source=PROCESSED_DATA_PATH, new_outlets=GEN_NEW_OUTLETS,
+                      new_items=GEN_NEW_ITEMS):
+    """
+    Path of a synthetic CSV scale times the size of the source, generated on first use.
+
+    Files are kept in data/synthetic, named after the source's content hash
+    and the generator settings, so a changed source gets a new file.
+
+    Args:
+        scale (float): Rows as a multiple of the source's
+        seed (int): Random seed
+        source (str): Source CSV
+        new_outlets (int): Outlets to add to the learned ones
+        new_items (int): Items to add to the learned ones
+
+    Returns:
+        str: Path of the synthetic CSV
+    """
+    name = (f"{os.path.splitext(os.path.basename(source))[0]}-{dataset_hash(source)[:12]}-{scale:g}x"
+            f"-seed{seed}-outlets{new_outlets}-items{new_items}.csv")
+    path = os.path.join(SYNTHETIC_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(SYNTHETIC_DIR, exist_ok=True)
+        df = pd.read_csv(source)
+        profile = learn_profile(df)
+        write_chunks(generate_chunks(profile, int(round(scale * len(df))), seed=seed,
+                                     new_outlets=new_outlets, new_items=new_items), path)
+    return path
+
+
+def scaled_dataset(path=PROCESSED_DATA_PATH):
+    """
+    Dataset of a benchmark or out-of-core run: the synthetic one when SYNTHETIC_SCALE is set.
+
+    Args:
+        path (str): Dataset used otherwise
+
+    Returns:
+        str: Dataset path
+    """
+    if SYNTHETIC_SCALE > 0:
+        return synthetic_dataset(SYNTHETIC_SCALE, source=path)
+    return path
+
+
+def compare(source, generated):
+    """
+    Summary statistics of the source next to a generated sample.
+
+    Args:
+        source (DataFrame): Source dataset
+        generated (DataFrame): Generated rows
+
+    Returns:
+        DataFrame: Per numeric column mean and standard deviation, per text
+        column distinct values and the most frequent value's share
+    """
+    rows = []
+    for col in source.columns:
+        if pd.api.types.is_numeric_dtype(source[col]):
+            rows.append([col, 'mean', source[col].mean(), generated[col].mean()])
+            rows.append([col, 'std', source[col].std(), generated[col].std()])
+        else:
+            top = source[col].value_counts().index[0]
+            rows.append([col, 'distinct', source[col].nunique(), generated[col].nunique()])
+            rows.append([col, f"share {top}", (source[col] == top).mean(), (generated[col] == top).mean()])
+    return pd.DataFrame(rows, columns=['column', 'statistic', 'source', 'generated'])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python generate_data.py <scale> [output .csv|.parquet]")
+    scale = float(sys.argv[1])
+    source = pd.read_csv(PROCESSED_DATA_PATH)
+    output = sys.argv[2] if len(sys.argv) > 2 else os.path.join(SYNTHETIC_DIR, f"processed_data_{scale:g}x.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    rows = int(round(scale * len(source)))
+
+    print(f"Learning the profile of {PROCESSED_DATA_PATH} ({len(source)} rows)...")
+    profile = learn_profile(source)
+    print(f"Generating {rows} rows ({scale:g}x) with {GEN_NEW_OUTLETS} new outlets and {GEN_NEW_ITEMS} new items "
+          f"into {output}...")
+    start = time.perf_counter()
+    written = write_chunks(generate_chunks(profile, rows, new_outlets=GEN_NEW_OUTLETS, new_items=GEN_NEW_ITEMS),
+                           output)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {written} rows in {seconds:.1f}s ({written / seconds:.0f} rows/s)")
+
+    sample = next(generate_chunks(profile, min(rows, GEN_CHUNK_SIZE), new_outlets=GEN_NEW_OUTLETS,
+                                  new_items=GEN_NEW_ITEMS))
+    print("\nSource and generated statistics (first chunk):")
+    print(compare(source, sample).to_string(index=False, float_format=lambda value: f"{value:.4f}"))
@@ -0,0 +1,110 @@
+import json
+import os
+import pickle
+import platform
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.pipeline import Pipeline
+
+MANIFEST_VERSION = 1
+
+
+def serving_pipeline(model):
+    """
+    Reduce a trained model to what the server needs to predict.
+
+    A fitted GridSearchCV or BudgetedHalvingSearch keeps its cross-validation
+    results and search state next to the refitted pipeline; only the fitted
+    preprocessor and final estimator are kept.
+
+    Args:
+        model: Fitted Pipeline, or a search exposing best_estimator_
+
+    Returns:
+        Pipeline: (preprocessor, model) pipeline
+    """
+    pipeline = getattr(model, 'best_estimator_', model)
+    if not isinstance(pipeline, Pipeline):
+        raise Exception(f"Cannot export {type(model).__name__}: expected a fitted Pipeline")
+    return Pipeline(steps=[
+        ('preprocessor', pipeline.named_steps['preprocessor']),
+        ('model', pipeline.named_steps['model'])
+    ])
+
+
+def _atomic_json(path, payload):
+    """Write JSON through a temporary file so readers never see a partial manifest."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def save_artifact(model, model_path, manifest_path, categorical_features, numerical_features,
+                  compress=0, **metadata):
+    """
+    Save the slim serving artifact and its manifest.
+
+    Args:
+        model: Fitted Pipeline or search, see serving_pipeline()
+        model_path (str): Path of the joblib artifact
+        manifest_path (str): Path of the JSON manifest
+        categorical_features (list): Categorical input columns
+        numerical_features (list): Numerical input columns
+        compress (int): joblib compression level, 0 for none (fastest to load)
+        **metadata: Extra JSON-serializable entries, e.g. training_fingerprint
+
+    Returns:
+        dict: The manifest written
+    """
+    pipeline = serving_pipeline(model)
+
+    tmp_path = model_path + '.tmp'
+    joblib.dump(pipeline, tmp_path, compress=compress)
+    os.replace(tmp_path, model_path)
+
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'artifact': os.path.basename(model_path),
+        'artifact_bytes': os.path.getsize(model_path),
+        'compress': compress,
+        'estimator': type(pipeline.named_steps['model']).__name__,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'categorical_features': categorical_features,
+        'numerical_features': numerical_features,
+        'libraries': {
+            'python': platform.python_version(),
+            'scikit-learn': sklearn.__version__,
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'joblib': joblib.__version__
+        }
+    }
+    manifest.update(metadata)
+    _atomic_json(manifest_path, manifest)
+    return manifest
+
+
+def load_manifest(manifest_path, features_path=None):
+    """
+    Load the model manifest.
+
+    Args:
+        manifest_path (str): Path of the JSON manifest
+        features_path (str): Legacy features.pkl read when there is no
+            manifest yet (artifacts saved before the manifest existed)
+
+    Returns:
+        dict: Manifest with at least the feature lists, or None if neither exists
+    """
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    if features_path and os.path.exists(features_path):
+        with open(features_path, 'rb') as f:
+            return pickle.load(f)
+    return None
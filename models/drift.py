@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Quantile bins of each numeric feature's reference histogram
+DRIFT_BINS = 10
+
+
+def numeric_reference(values, bins=DRIFT_BINS):
+    """
+    Reference histogram of a numeric feature on quantile bins.
+
+    The interior cut points are the training quantiles, so each bin holds
+    about the same share of the training rows and the two outer bins are
+    open-ended. A value v falls in bin searchsorted(edges, v, side='right').
+
+    Args:
+        values (array-like): Training values
+        bins (int): Number of bins (fewer if quantiles coincide)
+
+    Returns:
+        dict: Cut points, per-bin counts and missing count
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    present = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(present, np.linspace(0, 1, bins + 1)[1:-1])) if len(present) else np.array([])
+    counts = np.bincount(np.searchsorted(edges, present, side='right'), minlength=len(edges) + 1)
+    return {
+        'type': 'numeric',
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'missing': int(len(values) - len(present))
+    }
+
+
+def categorical_reference(counts):
+    """
+    Reference count table of a categorical feature.
+
+    Args:
+        counts (Mapping or Series): Count per category
+
+    Returns:
+        dict: Count per category, most frequent first
+    """
+    counts = pd.Series(dict(counts), dtype='int64').sort_values(ascending=False)
+    return {
+        'type': 'categorical',
+        'counts': {str(category): int(count) for category, count in counts.items()}
+    }
+
+
+def drift_reference(df, categorical_features, numerical_features, bins=DRIFT_BINS, category_counts=None):
+    """
+    Training-time summaries the serving drift monitor compares live inputs with.
+
+    Args:
+        df (DataFrame): Training features (or a uniform sample of them)
+        categorical_features (list): Categorical input columns
+        numerical_features (list): Numerical input columns
+        bins (int): Quantile bins per numeric feature
+        category_counts (dict): Exact per-column category counts, when df is
+            only a sample of the training data
+
+    Returns:
+        dict: JSON-serializable reference, saved in the model manifest
+    """
+    features = {}
+    for col in categorical_features:
+        if category_counts is not None:
+            counts = category_counts[col]
+        else:
+            counts = df[col].dropna().astype(str).value_counts()
+        features[col] = categorical_reference(counts)
+    for col in numerical_features:
+        features[col] = numeric_reference(df[col], bins=bins)
+    return {'rows': int(len(df)), 'bins': bins, 'features': features}
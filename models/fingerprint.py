@@ -0,0 +1,84 @@
+import hashlib
+import json
+import platform
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import BaseEstimator
+
+
+def _digest(value):
+    """Short SHA-256 of a JSON-serializable value."""
+    payload = json.dumps(value, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _estimator_params(estimator):
+    """
+    Flattened hyperparameters of an estimator, without nested estimator objects.
+
+    repr() of scikit-learn estimators hides default values and truncates long
+    output, so it can't be trusted to change when a parameter does.
+    """
+    params = {
+        key: value for key, value in estimator.get_params(deep=True).items()
+        if not isinstance(value, BaseEstimator)
+        and not (isinstance(value, (list, tuple)) and any(isinstance(v, (tuple, BaseEstimator)) for v in value))
+    }
+    params['class'] = type(estimator).__name__
+    return params
+
+
+def training_fingerprint(data_hash, features, preprocessors, models, param_grids, config):
+    """
+    Fingerprint everything a training run depends on.
+
+    Args:
+        data_hash (str): Content hash of the training data
+        features (dict): Feature lists by group
+        preprocessors (dict): Preprocessor name -> unfitted transformer
+        models (dict): Candidate name -> unfitted estimator
+        param_grids (dict): Candidate name -> tuning grid
+        config (dict): Training settings that affect the result
+
+    Returns:
+        dict: Component name -> digest, plus the library versions
+    """
+    return {
+        'data': data_hash,
+        'features': _digest(features),
+        'preprocessors': _digest({name: _estimator_params(p) for name, p in preprocessors.items()}),
+        'models': _digest({name: _estimator_params(m) for name, m in models.items()}),
+        'param_grids': _digest(param_grids),
+        'training_config': _digest(config),
+        'libraries': {
+            'python': platform.python_version(),
+            'scikit-learn': sklearn.__version__,
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'joblib': joblib.__version__
+        }
+    }
+
+
+def changed_inputs(previous, current):
+    """
+    Compare two fingerprints.
+
+    Args:
+        previous (dict): Fingerprint stored with the model, or None
+        current (dict): Fingerprint of this run
+
+    Returns:
+        list: Names of the inputs that changed, empty on a cache hit
+    """
+    if not previous:
+        return ['no previous fingerprint']
+    changed = [key for key in current if key != 'libraries' and previous.get(key) != current[key]]
+    previous_libraries = previous.get('libraries', {})
+    for library, version in current['libraries'].items():
+        if previous_libraries.get(library) != version:
+            changed.append(f"{library} {previous_libraries.get(library)} -> {version}")
+    return changed
@@ -0,0 +1,155 @@
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import r2_score
+
+from dataset import file_hash, dataset_hash
+
+try:
+    from streaming import score_chunk
+except ImportError:  # Imported as models.importance rather than from the models/ directory
+    from .streaming import score_chunk
+
+IMPORTANCE_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'backend', 'model', 'feature_importance.json')
+
+# Cached results kept for other model/data combinations
+MAX_CACHE_ENTRIES = 20
+
+
+def model_version(model_path):
+    """Identify a saved model by the content hash of its artifact."""
+    return file_hash(model_path)[:16]
+
+
+def _permuted_score(model_path, X, y, feature, seed):
+    """R² after shuffling one input column, run in a worker process."""
+    X = X.copy()
+    X[feature] = X[feature].values[np.random.RandomState(seed).permutation(len(X))]
+    y_true, y_pred, _ = score_chunk(model_path, X, y)
+    return r2_score(y_true, y_pred)
+
+
+def permutation_importance(model_path, X, y, features, n_repeats=5, n_jobs=-1, random_state=42):
+    """
+    Permutation importance of the model's input features.
+
+    Each of the original input columns (not the one-hot columns the
+    preprocessor creates) is shuffled n_repeats times and the drop in R² is
+    recorded. Every (feature, repeat) pair is an independent job, so features
+    and repeats are scored in parallel.
+
+    Args:
+        model_path (str): Saved model path
+        X (DataFrame): Evaluation features
+        y (Series): Evaluation target
+        features (list): Input columns to permute
+        n_repeats (int): Shuffles per feature
+        n_jobs (int): Worker processes, -1 for all cores
+        random_state (int): Seed of the shuffles
+
+    Returns:
+        dict: baseline R² and, per feature, the mean and std of the R² drop
+        and the drop of every repeat, most important feature first
+    """
+    _, baseline_pred, _ = score_chunk(model_path, X, y)
+    baseline = r2_score(y, baseline_pred)
+
+    seeds = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max, size=n_repeats)
+    jobs = [(feature, seed) for feature in features for seed in seeds]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_permuted_score)(model_path, X, y, feature, seed) for feature, seed in jobs
+    )
+
+    drops = {feature: [] for feature in features}
+    for (feature, _), score in zip(jobs, scores):
+        drops[feature].append(baseline - score)
+    importances = {
+        feature: {'mean': float(np.mean(values)), 'std': float(np.std(values)), 'repeats': values}
+        for feature, values in drops.items()
+    }
+    return {
+        'baseline_r2': float(baseline),
+        'importances': dict(sorted(importances.items(), key=lambda item: item[1]['mean'], reverse=True))
+    }
+
+
+def _read_cache(cache_path):
+    """Read the importance cache, or an empty one."""
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'entries': {}}
+
+
+def _cache_key(model_path, data_path, settings):
+    """Cache key: model version, dataset content hash and computation settings."""
+    return f"{model_version(model_path)}-{dataset_hash(data_path)[:16]}-{json.dumps(settings, sort_keys=True)}"
+
+
+def lookup_importance(model_path, data_path, cache_path=IMPORTANCE_CACHE_PATH, settings=None):
+    """
+    Cached permutation importance of a model on a dataset, without computing it.
+
+    Args:
+        model_path (str): Saved model path
+        data_path (str): Dataset the importance was computed on
+        cache_path (str): Importance cache file
+        settings (dict): Computation settings; None returns the latest entry
+            for this model and dataset whatever its settings
+
+    Returns:
+        dict: Cached result, or None on a cache miss
+    """
+    entries = _read_cache(cache_path)['entries']
+    if settings is not None:
+        return entries.get(_cache_key(model_path, data_path, settings))
+    prefix = f"{model_version(model_path)}-{dataset_hash(data_path)[:16]}-"
+    matches = [entry for key, entry in entries.items() if key.startswith(prefix)]
+    return max(matches, key=lambda entry: entry['created']) if matches else None
+
+
+def cached_permutation_importance(model_path, data_path, X, y, features, n_repeats=5, n_jobs=-1,
+                                  random_state=42, cache_path=IMPORTANCE_CACHE_PATH):
+    """
+    Permutation importance, computed once per model version and dataset.
+
+    Args:
+        model_path (str): Saved model path
+        data_path (str): File X and y were read from, hashed for the cache key
+        X (DataFrame): Evaluation features
+        y (Series): Evaluation target
+        features (list): Input columns to permute
+        n_repeats (int): Shuffles per feature
+        n_jobs (int): Worker processes, -1 for all cores
+        random_state (int): Seed of the shuffles
+        cache_path (str): Importance cache file
+
+    Returns:
+        tuple: (result, cache_hit)
+    """
+    settings = {'rows': len(X), 'features': list(features), 'n_repeats': n_repeats, 'random_state': random_state}
+    cached = lookup_importance(model_path, data_path, cache_path, settings)
+    if cached is not None:
+        return cached, True
+
+    result = permutation_importance(model_path, X, y, features, n_repeats=n_repeats, n_jobs=n_jobs,
+                                    random_state=random_state)
+    result.update(settings=settings, created=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  model_version=model_version(model_path), data_path=os.path.basename(data_path))
+
+    cache = _read_cache(cache_path)
+    cache['entries'][_cache_key(model_path, data_path, settings)] = result
+    # Drop the oldest entries beyond the limit
+    keep = sorted(cache['entries'].items(), key=lambda item: item[1]['created'])[-MAX_CACHE_ENTRIES:]
+    cache['entries'] = dict(keep)
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
+    return result, False
@@ -0,0 +1,76 @@
+def unseen_categories(encoder, categorical_features, X):
+    """
+    Categories in new rows that a fitted encoder has not seen.
+
+    The fitted encoder vocabularies are kept as they are. Unseen categories
+    are encoded as all zeros by the one-hot encoder (handle_unknown='ignore')
+    or as missing by the ordinal encoder, so they are only reported; a full
+    retrain is needed to learn them.
+
+    Args:
+        encoder (OneHotEncoder or OrdinalEncoder): Fitted categorical encoder
+        categorical_features (list): Categorical columns, in encoder order
+        X (DataFrame): New rows
+
+    Returns:
+        dict: Column -> (sorted unseen values, percentage of rows), only for
+        columns with unseen values
+    """
+    report = {}
+    for column, known in zip(categorical_features, encoder.categories_):
+        unseen = sorted(set(X[column].dropna().astype(str)) - set(known.astype(str)))
+        if unseen:
+            report[column] = (unseen, X[column].astype(str).isin(unseen).mean() * 100)
+    return report
+
+
+def update_estimator(estimator, X, y, increment):
+    """
+    Update a fitted estimator in place on new, already preprocessed rows.
+
+    Estimators with partial_fit take one more pass over the rows.
+    RandomForest adds trees fitted on the new rows, GradientBoosting adds
+    stages fitted on their residuals and HistGradientBoosting adds boosting
+    iterations.
+
+    Args:
+        estimator: Fitted final estimator of the pipeline
+        X (array): Preprocessed new rows
+        y (Series): Target of the new rows
+        increment (int): Trees or iterations to add to tree ensembles
+
+    Returns:
+        str: Description of the update
+    """
+    name = type(estimator).__name__
+    if hasattr(estimator, 'partial_fit'):
+        estimator.partial_fit(X, y)
+        return f"Updated {name} with partial_fit"
+    if 'warm_start' in estimator.get_params() and hasattr(estimator, 'n_estimators'):
+        fitted = len(estimator.estimators_)
+        estimator.set_params(warm_start=True, n_estimators=fitted + increment)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+        return f"Added {increment} trees to {name} ({fitted} existing)"
+    if 'warm_start' in estimator.get_params() and hasattr(estimator, 'max_iter'):
+        fitted = estimator.n_iter_
+        estimator.set_params(warm_start=True, max_iter=fitted + increment)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+        return f"Added {increment} iterations to {name} ({fitted} existing)"
+    raise Exception(f"{name} cannot be updated incrementally, run train_model.py instead")
+
+
+def is_worse(previous, updated, tolerance=0.0):
+    """
+    Whether updated holdout metrics are worse than the previous ones.
+
+    Args:
+        previous (dict): Holdout metrics of the previous model
+        updated (dict): Holdout metrics of the updated model
+        tolerance (float): Relative RMSE increase still accepted
+
+    Returns:
+        bool: True if the updated RMSE is above the previous one by more than the tolerance
+    """
+    return updated['RMSE'] > previous['RMSE'] * (1 + tolerance)
@@ -0,0 +1,36 @@
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+
+
+def ordinal_preprocessor(categorical_features, numerical_features):
+    """
+    Preprocessor for models with native categorical support.
+
+    Each categorical feature becomes one integer column instead of a wide
+    one-hot matrix. Unknown categories become missing values, which the
+    model handles natively.
+
+    Args:
+        categorical_features (list): Categorical input columns
+        numerical_features (list): Numerical input columns
+
+    Returns:
+        ColumnTransformer: Unfitted preprocessor, numerical columns first
+    """
+    return ColumnTransformer(
+        transformers=[
+            ('num', SimpleImputer(strategy='mean'), numerical_features),
+            ('cat', Pipeline(steps=[
+                ('imputer', SimpleImputer(strategy='most_frequent')),
+                ('ordinal', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan))
+            ]), categorical_features)
+        ]
+    )
+
+
+def native_categorical_mask(categorical_features, numerical_features):
+    """Which columns of ordinal_preprocessor's output are categorical."""
+    return [False] * len(numerical_features) + [True] * len(categorical_features)
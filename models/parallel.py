@@ -0,0 +1,118 @@
+import os
+
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+try:
+    from profiler import ResourceMonitor
+except ImportError:  # Imported as models.parallel rather than from the models/ directory
+    from .profiler import ResourceMonitor
+
+
+def available_cores(n_jobs=-1):
+    """
+    Resolve an n_jobs setting to a number of cores.
+
+    Args:
+        n_jobs (int): Number of cores, or -1 for all of them
+
+    Returns:
+        int: Number of cores to use
+    """
+    total = os.cpu_count() or 1
+    if n_jobs is None or n_jobs < 1:
+        return total
+    return min(n_jobs, total)
+
+
+def _is_parallel(model):
+    """Whether a model spreads its own fit over several cores."""
+    if isinstance(model, HistGradientBoostingRegressor):
+        # Multithreaded through OpenMP, capped by threadpool_limits
+        return True
+    params = model.get_params()
+    return 'n_jobs' in params and 'n_estimators' in params
+
+
+def allocate_cores(models, n_cores):
+    """
+    Split cores between candidates that are trained at the same time.
+
+    Single-threaded candidates get one core each. The remaining cores are
+    shared evenly by the ensembles that build their trees in parallel (those
+    with both n_estimators and n_jobs, e.g. RandomForestRegressor, and the
+    OpenMP-based HistGradientBoostingRegressor), so the
+    total never exceeds n_cores and no core sits idle while a parallel model
+    could use it. LinearRegression's n_jobs only helps multi-target fits, so
+    it counts as single-threaded.
+
+    Args:
+        models (dict): Candidate name -> estimator
+        n_cores (int): Cores available for the whole comparison
+
+    Returns:
+        dict: Candidate name -> number of cores
+    """
+    parallel = [name for name, model in models.items() if _is_parallel(model)]
+    serial = [name for name in models if name not in parallel]
+
+    allocation = {name: 1 for name in serial}
+    spare = max(n_cores - len(serial), len(parallel))
+    for i, name in enumerate(parallel):
+        # Hand out the remainder one core at a time so the shares differ by at most one
+        allocation[name] = max(1, spare // len(parallel) + (1 if i < spare % len(parallel) else 0))
+    return allocation
+
+
+def _fit_candidate(name, preprocessor, model, n_threads, X_train, y_train, X_test):
+    """Fit one candidate pipeline inside a worker process and predict the test set."""
+    monitor = ResourceMonitor().start()
+    pipeline = Pipeline(steps=[
+        ('preprocessor', clone(preprocessor)),
+        ('model', clone(model))
+    ])
+    if 'n_jobs' in model.get_params():
+        pipeline.set_params(model__n_jobs=n_threads)
+    # Cap BLAS/OpenMP threads so candidates sharing the box don't oversubscribe it
+    with threadpool_limits(limits=n_threads):
+        pipeline.fit(X_train, y_train)
+        y_pred = pipeline.predict(X_test)
+    profile = dict(monitor.stop(), n_threads=n_threads)
+    return name, {'pipeline': pipeline, 'y_pred': y_pred, 'fit_seconds': profile['wall_seconds'], 'profile': profile}
+
+
+def fit_candidates(models, preprocessor, X_train, y_train, X_test, n_jobs=-1, preprocessors=None):
+    """
+    Train and evaluate all candidate models concurrently in worker processes.
+
+    Args:
+        models (dict): Candidate name -> unfitted estimator
+        preprocessor (ColumnTransformer): Shared, unfitted preprocessor
+        X_train (DataFrame): Training features
+        y_train (Series): Training target
+        X_test (DataFrame): Test features to predict
+        n_jobs (int): Cores to use for the whole comparison, -1 for all
+        preprocessors (dict): Candidate name -> preprocessor for candidates
+            that need a different encoding than the shared one
+
+    Returns:
+        dict: Candidate name -> {'pipeline', 'y_pred', 'fit_seconds', 'profile'},
+        in the same order as models; profile holds the wall time, CPU time and
+        peak RSS measured in the worker
+    """
+    preprocessors = preprocessors or {}
+    n_cores = available_cores(n_jobs)
+    allocation = allocate_cores(models, n_cores)
+    for name in models:
+        print(f"Training {name} on {allocation[name]} core(s)...")
+
+    results = Parallel(n_jobs=min(len(models), n_cores), backend='loky')(
+        delayed(_fit_candidate)(name, preprocessors.get(name, preprocessor), model, allocation[name],
+                                X_train, y_train, X_test)
+        for name, model in models.items()
+    )
+    results = dict(results)
+    return {name: results[name] for name in models}
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, or None if unknown.
+
+    Reads /proc/self/statm where available (Linux), which is cheap enough to
+    sample from a background thread.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss():
+    """Lifetime peak RSS of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceMonitor:
+    """
+    Wall time, CPU time and peak RSS of the current process over a block of work.
+
+    CPU time includes every thread of the process (e.g. a RandomForest's
+    n_jobs threads). The peak RSS is sampled by a daemon thread because the
+    OS only keeps the process-lifetime peak.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        """Track the highest RSS seen until stopped."""
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and rss > self._peak:
+                self._peak = rss
+
+    def start(self):
+        """Start measuring."""
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_rss = current_rss()
+        self._peak = self._start_rss or 0
+        self._stop.clear()
+        if self._start_rss is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop measuring.
+
+        Returns:
+            dict: wall_seconds, cpu_seconds, rss_start_mb and peak_rss_mb
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            end_rss = current_rss()
+            peak = max(self._peak, end_rss or 0)
+        else:
+            peak = _max_rss()
+        return {
+            'wall_seconds': time.perf_counter() - self._start_wall,
+            'cpu_seconds': time.process_time() - self._start_cpu,
+            'rss_start_mb': self._start_rss / 1024 ** 2 if self._start_rss is not None else None,
+            'peak_rss_mb': peak / 1024 ** 2 if peak is not None else None
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.result = self.stop()
+        return False
+
+
+def search_profile(search):
+    """
+    Per-candidate and per-fold timings of a fitted hyperparameter search.
+
+    GridSearchCV only keeps the mean and standard deviation over folds, while
+    BudgetedHalvingSearch records every fold it evaluated.
+
+    Args:
+        search: Fitted GridSearchCV or BudgetedHalvingSearch
+
+    Returns:
+        dict: Search type, candidates and, if available, folds
+    """
+    if hasattr(search, 'cv_results_'):
+        results = search.cv_results_
+        return {
+            'type': type(search).__name__,
+            'n_splits': search.n_splits_,
+            'refit_seconds': getattr(search, 'refit_time_', None),
+            'candidates': [
+                {
+                    'params': params,
+                    'mean_fit_seconds': float(results['mean_fit_time'][i]),
+                    'std_fit_seconds': float(results['std_fit_time'][i]),
+                    'mean_score_seconds': float(results['mean_score_time'][i]),
+                    'std_score_seconds': float(results['std_score_time'][i]),
+                    'mean_test_score': float(results['mean_test_score'][i])
+                }
+                for i, params in enumerate(results['params'])
+            ]
+        }
+    return {
+        'type': type(search).__name__,
+        'search_seconds': getattr(search, 'search_seconds_', None),
+        'rungs': getattr(search, 'history_', []),
+        'folds': getattr(search, 'fold_timings_', [])
+    }
+
+
+class TrainingProfiler:
+    """
+    Records resource usage of the stages of a training run.
+
+    Stages are sequential: starting one ends the previous one, so a flat
+    training script only needs a start_stage() call in front of each step.
+    Work done in worker processes (candidate fits, search folds) is measured
+    there and attached with add_candidate() and add_search().
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.candidates = {}
+        self.search = None
+        self._current = None
+        self._monitor = None
+        self._run = ResourceMonitor().start()
+
+    def start_stage(self, name):
+        """End the current stage, if any, and start measuring a new one."""
+        self.end_stage()
+        self._current = name
+        self._monitor = ResourceMonitor().start()
+
+    def end_stage(self):
+        """End the current stage."""
+        if self._current is not None:
+            self.stages.append(dict(stage=self._current, **self._monitor.stop()))
+            self._current = None
+
+    def add_candidate(self, name, profile):
+        """Attach the resource usage measured while fitting a candidate model."""
+        self.candidates[name] = profile
+
+    def add_search(self, details):
+        """Attach per-candidate and per-fold timings of the hyperparameter search."""
+        self.search = details
+
+    def report(self):
+        """
+        Build the profile report.
+
+        Returns:
+            dict: Total usage, stages, candidates and search details
+        """
+        self.end_stage()
+        total = self._run.stop()
+        return {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'total': total,
+            'stages': self.stages,
+            'candidates': self.candidates,
+            'search': self.search
+        }
+
+    def write(self, path):
+        """Write the profile report as JSON and print a stage summary."""
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+        print(f"\n{'Stage':<26}{'Wall (s)':>10}{'CPU (s)':>10}{'Peak RSS (MB)':>15}")
+        for stage in report['stages']:
+            peak = f"{stage['peak_rss_mb']:.1f}" if stage['peak_rss_mb'] is not None else 'n/a'
+            print(f"{stage['stage']:<26}{stage['wall_seconds']:>10.2f}{stage['cpu_seconds']:>10.2f}{peak:>15}")
+        for name, candidate in report['candidates'].items():
+            peak = f"{candidate['peak_rss_mb']:.1f}" if candidate.get('peak_rss_mb') is not None else 'n/a'
+            print(f"  {name:<24}{candidate['wall_seconds']:>10.2f}{candidate['cpu_seconds']:>10.2f}{peak:>15}")
+        return report
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+
+
+def _params_key(params):
+    """Stable string key for a parameter combination."""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _data_signature(X, y):
+    """Hash the training data so persisted scores are only reused on the same rows."""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _fit_and_score(estimator, params, X, y, train_idx, test_idx):
+    """Fit one candidate on one fold and return its R² on the held-out part, with timings."""
+    start, start_cpu = time.perf_counter(), time.process_time()
+    model = clone(estimator).set_params(**params)
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_seconds = time.perf_counter() - start
+    score = r2_score(y.iloc[test_idx], model.predict(X.iloc[test_idx]))
+    return score, {
+        'fit_seconds': fit_seconds,
+        'score_seconds': time.perf_counter() - start - fit_seconds,
+        'cpu_seconds': time.process_time() - start_cpu
+    }
+
+
+class BudgetedHalvingSearch:
+    """
+    Successive-halving hyperparameter search under a time budget.
+
+    Every candidate of the grid is first scored on a small resource (a subset
+    of the rows or a small number of trees). Only the best 1/factor of them
+    move on to the next rung, where the resource is multiplied by factor,
+    until the full resource is reached. Scores are persisted to a JSON file
+    so a later run on the same data can skip evaluations it already did.
+
+    Exposes the same attributes the training script uses from GridSearchCV:
+    best_params_, best_score_, best_estimator_ and predict(). Per-fold fit and
+    score timings of the evaluations run by this fit are kept in fold_timings_.
+    """
+
+    def __init__(self, estimator, param_grid, resource='n_samples', factor=3,
+                 cv=3, budget_seconds=None, cpu_budget_seconds=None,
+                 results_path=None, warm_start=True, min_samples=200,
+                 min_estimators=10, n_jobs=-1, random_state=42,
+                 resource_param='model__n_estimators'):
+        """
+        Args:
+            estimator (Pipeline): Pipeline whose final step is named 'model'
+            param_grid (dict): Grid in GridSearchCV format
+            resource (str): 'n_samples' or 'n_estimators'
+            factor (int): Fraction of candidates kept and resource growth per rung
+            cv (int): Number of cross-validation folds
+            budget_seconds (float): Wall-clock budget, None for unlimited
+            cpu_budget_seconds (float): CPU budget in core-seconds, converted to
+                wall-clock using the number of worker processes
+            results_path (str): JSON file used to persist and warm-start scores
+            warm_start (bool): Reuse scores found in results_path
+            min_samples (int): Smallest row subset used on the first rung
+            min_estimators (int): Smallest number of trees used on the first rung
+            n_jobs (int): Worker processes for candidate/fold evaluation
+            random_state (int): Seed for row subsampling and folds
+            resource_param (str): Pipeline parameter holding the number of
+                trees when resource is 'n_estimators' (e.g. 'model__max_iter')
+        """
+        if resource not in ('n_samples', 'n_estimators'):
+            raise ValueError(f"Unknown search resource: {resource}")
+
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.resource = resource
+        self.factor = factor
+        self.cv = cv
+        self.budget_seconds = budget_seconds
+        self.cpu_budget_seconds = cpu_budget_seconds
+        self.results_path = results_path
+        self.warm_start = warm_start
+        self.min_samples = min_samples
+        self.min_estimators = min_estimators
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.resource_param = resource_param
+
+    def _deadline(self, start):
+        """Compute the wall-clock deadline from the configured budgets."""
+        budgets = []
+        if self.budget_seconds:
+            budgets.append(float(self.budget_seconds))
+        if self.cpu_budget_seconds:
+            workers = os.cpu_count() if self.n_jobs in (None, -1) else max(1, self.n_jobs)
+            budgets.append(float(self.cpu_budget_seconds) / workers)
+        return start + min(budgets) if budgets else None
+
+    def _resource_schedule(self, n_candidates, max_resource, min_resource):
+        """Return the resource used on each rung, ending at max_resource."""
+        n_rungs = 1 + int(math.floor(math.log(max(n_candidates, 1), self.factor)))
+        # Do not start below the configured minimum even if that means fewer rungs
+        while n_rungs > 1 and max_resource / self.factor ** (n_rungs - 1) < min_resource:
+            n_rungs -= 1
+        return [int(round(max_resource / self.factor ** (n_rungs - 1 - i))) for i in range(n_rungs)]
+
+    def _estimator_name(self):
+        """Name of the final estimator, so different models never share scores."""
+        final = self.estimator.steps[-1][1] if hasattr(self.estimator, 'steps') else self.estimator
+        return type(final).__name__
+
+    def _load_results(self, signature):
+        """Load persisted scores for this data and grid, if any."""
+        if not (self.warm_start and self.results_path and os.path.exists(self.results_path)):
+            return {}
+        try:
+            with open(self.results_path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (saved.get('data_signature') != signature or saved.get('resource') != self.resource
+                or saved.get('estimator') != self._estimator_name()):
+            return {}
+        return {(entry['params'], entry['resource_value']): entry['score'] for entry in saved.get('evaluations', [])}
+
+    def _save_results(self, signature, scores):
+        """Persist every evaluated (candidate, resource) score."""
+        if not self.results_path:
+            return
+        os.makedirs(os.path.dirname(self.results_path) or '.', exist_ok=True)
+        with open(self.results_path, 'w') as f:
+            json.dump({
+                'data_signature': signature,
+                'resource': self.resource,
+                'estimator': self._estimator_name(),
+                'best_params': self.best_params_,
+                'best_score': self.best_score_,
+                'evaluations': [
+                    {'params': params, 'resource_value': value, 'score': score}
+                    for (params, value), score in scores.items()
+                ]
+            }, f, indent=2, default=str)
+
+    def fit(self, X, y):
+        """
+        Run the search and refit the best candidate on all of X, y.
+
+        Args:
+            X (DataFrame): Training features
+            y (Series): Training target
+
+        Returns:
+            BudgetedHalvingSearch: self
+        """
+        start = time.time()
+        deadline = self._deadline(start)
+        signature = _data_signature(X, y)
+        scores = self._load_results(signature)
+        reused = len(scores)
+
+        grid = dict(self.param_grid)
+        if self.resource == 'n_estimators':
+            max_resource = max(grid.pop(self.resource_param, [100]))
+            min_resource = self.min_estimators
+        else:
+            max_resource = len(X)
+            min_resource = self.min_samples
+
+        candidates = [_params_key(p) for p in ParameterGrid(grid)]
+        schedule = self._resource_schedule(len(candidates), max_resource, min_resource)
+        order = np.random.RandomState(self.random_state).permutation(len(X))
+        folds = KFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+
+        self.history_ = []
+        self.fold_timings_ = []
+        best_rung_scores = {}
+        rung_seconds = 0.0
+
+        for rung, value in enumerate(schedule):
+            # Stop before a rung that would not fit in the remaining budget;
+            # each rung costs roughly the same since candidates shrink as the resource grows
+            if deadline is not None and rung > 0 and time.time() + rung_seconds > deadline:
+                print(f"Search budget exhausted before rung {rung + 1}/{len(schedule)}")
+                break
+
+            rung_start = time.time()
+            if self.resource == 'n_samples':
+                Xr, yr = X.iloc[order[:value]], y.iloc[order[:value]]
+            else:
+                Xr, yr = X, y
+
+            pending = [c for c in candidates if (c, value) not in scores]
+            splits = list(folds.split(Xr))
+            jobs = []
+            for key in pending:
+                params = json.loads(key)
+                if self.resource == 'n_estimators':
+                    params[self.resource_param] = value
+                for train_idx, test_idx in splits:
+                    jobs.append(delayed(_fit_and_score)(self.estimator, params, Xr, yr, train_idx, test_idx))
+            fold_results = Parallel(n_jobs=self.n_jobs)(jobs) if jobs else []
+            for i, key in enumerate(pending):
+                candidate_folds = fold_results[i * len(splits):(i + 1) * len(splits)]
+                scores[(key, value)] = float(np.mean([score for score, _ in candidate_folds]))
+                for fold, (score, timing) in enumerate(candidate_folds):
+                    self.fold_timings_.append(dict(rung=rung, resource_value=value, params=key,
+                                                   fold=fold, score=score, **timing))
+
+            rung_scores = {c: scores[(c, value)] for c in candidates}
+            rung_seconds = time.time() - rung_start
+            self.history_.append({
+                'rung': rung,
+                'resource_value': value,
+                'n_candidates': len(candidates),
+                'seconds': rung_seconds,
+                'best_score': max(rung_scores.values())
+            })
+            print(f"Rung {rung + 1}/{len(schedule)}: {len(candidates)} candidates "
+                  f"with {self.resource}={value}, best R² = {max(rung_scores.values()):.4f} "
+                  f"({rung_seconds:.1f}s)")
+            best_rung_scores = rung_scores
+
+            keep = max(1, int(math.ceil(len(candidates) / self.factor)))
+            candidates = sorted(candidates, key=lambda c: rung_scores[c], reverse=True)[:keep]
+
+        best_key = max(best_rung_scores, key=best_rung_scores.get)
+        self.best_params_ = json.loads(best_key)
+        if self.resource == 'n_estimators':
+            self.best_params_[self.resource_param] = max_resource
+        self.best_score_ = best_rung_scores[best_key]
+        self._save_results(signature, scores)
+
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y)
+        self.search_seconds_ = time.time() - start
+        if reused:
+            print(f"Warm start reused {reused} persisted evaluations")
+        return self
+
+    def predict(self, X):
+        """Predict with the refitted best candidate."""
+        return self.best_estimator_.predict(X)
@@ -0,0 +1,178 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+SEGMENT_COLUMNS = ['Outlet Identifier', 'Outlet Type', 'Item Type', 'Item Identifier Prefix']
+
+# Per-segment sufficient statistics; everything else is derived from them
+_STATISTICS = ['count', 'sse', 'sae', 'sum_error', 'mean_y', 'm2_y']
+
+
+def _chunk_statistics(keys, y_true, errors):
+    """Sufficient statistics of one chunk for every segment of one column, in one groupby."""
+    frame = pd.DataFrame({
+        'key': np.asarray(keys, dtype=object),
+        'y': y_true,
+        'error': errors,
+        'squared': errors ** 2,
+        'absolute': np.abs(errors)
+    })
+    grouped = frame.groupby('key', sort=False)
+    stats = pd.DataFrame({
+        'count': grouped['y'].count(),
+        'sse': grouped['squared'].sum(),
+        'sae': grouped['absolute'].sum(),
+        'sum_error': grouped['error'].sum(),
+        'mean_y': grouped['y'].mean(),
+        'm2_y': grouped['y'].var(ddof=0) * grouped['y'].count()
+    })
+    return stats
+
+
+def _merge(a, b):
+    """Merge two statistics frames segment-wise (Chan et al. for the target variance)."""
+    index = a.index.union(b.index)
+    a = a.reindex(index, fill_value=0.0)
+    b = b.reindex(index, fill_value=0.0)
+    count = a['count'] + b['count']
+    delta = b['mean_y'] - a['mean_y']
+    merged = a[['sse', 'sae', 'sum_error']] + b[['sse', 'sae', 'sum_error']]
+    merged['count'] = count
+    merged['mean_y'] = a['mean_y'] + delta * b['count'] / count
+    merged['m2_y'] = a['m2_y'] + b['m2_y'] + delta ** 2 * a['count'] * b['count'] / count
+    return merged[_STATISTICS]
+
+
+class SegmentMetrics:
+    """
+    Error metrics per segment of several columns, accumulated over chunks.
+
+    Each chunk costs one vectorized groupby per segment column, whatever the
+    number of segments. Only per-segment sums and running moments are kept,
+    so the accumulator can follow a streamed evaluation.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = list(columns or SEGMENT_COLUMNS)
+        self.stats = {column: pd.DataFrame(columns=_STATISTICS, dtype=float) for column in self.columns}
+
+    def update(self, segments, y_true, y_pred):
+        """
+        Merge a chunk of predictions.
+
+        Args:
+            segments (DataFrame): Chunk holding the segment columns
+            y_true (array-like): Actual values
+            y_pred (array-like): Predicted values
+        """
+        y_true = np.asarray(y_true, dtype=float)
+        errors = np.asarray(y_pred, dtype=float) - y_true
+        for column in self.columns:
+            keys = segments[column].astype(object).where(segments[column].notna(), 'Missing')
+            chunk = _chunk_statistics(keys, y_true, errors)
+            self.stats[column] = chunk if self.stats[column].empty else _merge(self.stats[column], chunk)
+
+    def metrics(self, column):
+        """
+        Metrics of every segment of a column.
+
+        Args:
+            column (str): Segment column
+
+        Returns:
+            DataFrame: count, MSE, RMSE, MAE, R2 and bias (mean of predicted - actual)
+            per segment, worst RMSE first
+        """
+        stats = self.stats[column]
+        mse = stats['sse'] / stats['count']
+        variance = stats['m2_y'] / stats['count']
+        metrics = pd.DataFrame({
+            'count': stats['count'].astype(int),
+            'MSE': mse,
+            'RMSE': np.sqrt(mse),
+            'MAE': stats['sae'] / stats['count'],
+            # R² is undefined for a segment with a constant target
+            'R2': (1 - mse / variance).where(variance > 0),
+            'Bias': stats['sum_error'] / stats['count'],
+            'Mean Actual': stats['mean_y']
+        })
+        metrics.index.name = column
+        return metrics.sort_values('RMSE', ascending=False)
+
+
+def _round(name, value, digits=6):
+    """Round to significant digits so reports diff cleanly between runs; counts stay integers."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if name == 'count':
+        return int(value)
+    return float(f"{value:.{digits}g}")
+
+
+def build_report(segment_metrics, overall, performance, model_info):
+    """
+    Assemble a structured evaluation report.
+
+    Keys and segments are sorted and numbers rounded, so two reports can be
+    compared with a plain text diff or compare_reports().
+
+    Args:
+        segment_metrics (SegmentMetrics): Accumulated segment statistics
+        overall (dict): Global metrics
+        performance (dict): Latency and throughput figures
+        model_info (dict): Identifies the model version and data evaluated
+
+    Returns:
+        dict: JSON-serializable report
+    """
+    segments = {}
+    for column in segment_metrics.columns:
+        metrics = segment_metrics.metrics(column).sort_index()
+        segments[column] = {
+            str(segment): {name: _round(name, value) for name, value in row.items()}
+            for segment, row in metrics.iterrows()
+        }
+    return {
+        'model': model_info,
+        'overall': {name: _round(name, value) for name, value in overall.items()},
+        'performance': {name: _round(name, value) for name, value in performance.items()},
+        'segments': segments
+    }
+
+
+def write_report(report, path):
+    """Write a report as sorted, indented JSON."""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def compare_reports(previous, current, metric='RMSE'):
+    """
+    Compare a metric per segment between two reports.
+
+    Args:
+        previous (dict): Report of the previous model version
+        current (dict): Report of the current model version
+        metric (str): Metric to compare
+
+    Returns:
+        DataFrame: column, segment, previous, current and change, largest
+        increase first (for error metrics, the worst regressions); segments
+        missing from one report have NaN values
+    """
+    rows = []
+    for column in sorted(set(previous['segments']) | set(current['segments'])):
+        before = previous['segments'].get(column, {})
+        after = current['segments'].get(column, {})
+        for segment in sorted(set(before) | set(after)):
+            rows.append({
+                'column': column,
+                'segment': segment,
+                'previous': before.get(segment, {}).get(metric),
+                'current': after.get(segment, {}).get(metric)
+            })
+    comparison = pd.DataFrame(rows, columns=['column', 'segment', 'previous', 'current'])
+    comparison[['previous', 'current']] = comparison[['previous', 'current']].astype(float)
+    comparison['change'] = comparison['current'] - comparison['previous']
+    return comparison.sort_values('change', ascending=False, na_position='last').reset_index(drop=True)
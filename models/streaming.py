@@ -0,0 +1,213 @@
+from collections import Counter
+
+import joblib
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Running count, mean and variance of a numeric column.
+
+    Chunks are merged with Chan et al.'s parallel update, which stays
+    numerically stable for long streams unlike accumulating sum and sum of
+    squares. Missing values are counted separately so the variance after
+    mean imputation can be derived without a second pass.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        """
+        Merge a chunk of values into the running statistics.
+
+        Args:
+            values (array-like): Chunk of numeric values, NaN for missing
+        """
+        values = np.asarray(values, dtype=float)
+        observed = values[~np.isnan(values)]
+        self.missing += len(values) - len(observed)
+        if len(observed) == 0:
+            return
+
+        n = len(observed)
+        chunk_mean = observed.mean()
+        chunk_m2 = ((observed - chunk_mean) ** 2).sum()
+
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self):
+        """Population variance of the observed values."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def imputed_variance(self):
+        """Population variance once missing values are filled with the mean."""
+        total = self.count + self.missing
+        return self.m2 / total if total else 0.0
+
+
+class CategoryCounts:
+    """Running category frequencies of a categorical column."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.missing = 0
+
+    def update(self, values):
+        """
+        Merge a chunk of values into the running counts.
+
+        Args:
+            values (Series): Chunk of categorical values
+        """
+        self.missing += int(values.isnull().sum())
+        self.counts.update(values.dropna().astype(str).value_counts().to_dict())
+
+    @property
+    def mode(self):
+        """Most frequent category seen so far."""
+        return self.counts.most_common(1)[0][0] if self.counts else None
+
+    @property
+    def categories(self):
+        """Sorted vocabulary seen so far."""
+        return sorted(self.counts)
+
+
+class RunningRegressionMetrics:
+    """
+    Running MSE, RMSE, MAE and R² over chunks of predictions.
+
+    The squared and absolute errors are kept as running means and the target
+    variance as RunningMoments, both merged chunk by chunk, so R² does not
+    suffer from the cancellation of 1 - SSE / (sum(y²) - sum(y)² / n) on
+    long streams with a large mean.
+    """
+
+    def __init__(self):
+        self.target = RunningMoments()
+        self.count = 0
+        self.mean_squared_error = 0.0
+        self.mean_absolute_error = 0.0
+
+    def update(self, y_true, y_pred):
+        """
+        Merge a chunk of targets and predictions.
+
+        Args:
+            y_true (array-like): Actual values
+            y_pred (array-like): Predicted values
+        """
+        y_true = np.asarray(y_true, dtype=float)
+        errors = y_true - np.asarray(y_pred, dtype=float)
+        n = len(errors)
+        if n == 0:
+            return
+
+        total = self.count + n
+        self.mean_squared_error += ((errors ** 2).mean() - self.mean_squared_error) * n / total
+        self.mean_absolute_error += (np.abs(errors).mean() - self.mean_absolute_error) * n / total
+        self.count = total
+        self.target.update(y_true)
+
+    @property
+    def mse(self):
+        """Mean squared error."""
+        return self.mean_squared_error
+
+    @property
+    def rmse(self):
+        """Root mean squared error."""
+        return float(np.sqrt(self.mean_squared_error))
+
+    @property
+    def mae(self):
+        """Mean absolute error."""
+        return self.mean_absolute_error
+
+    @property
+    def r2(self):
+        """Coefficient of determination."""
+        variance = self.target.variance
+        return 1 - self.mean_squared_error / variance if variance else 0.0
+
+
+class ReservoirSample:
+    """
+    Fixed-size uniform sample of rows from a stream (Vitter's Algorithm R).
+
+    Every row seen so far has the same probability of being in the sample,
+    whatever the length of the stream, and memory stays at size rows.
+    """
+
+    def __init__(self, size, n_columns, random_state=42):
+        self.size = size
+        self.seen = 0
+        self.rows = np.empty((size, n_columns))
+        self.random = np.random.RandomState(random_state)
+
+    def update(self, rows):
+        """
+        Offer a chunk of rows to the sample.
+
+        Args:
+            rows (ndarray): Chunk of shape (n, n_columns)
+        """
+        rows = np.asarray(rows, dtype=float)
+
+        # Fill the free slots first
+        free = min(max(self.size - self.seen, 0), len(rows))
+        self.rows[self.seen:self.seen + free] = rows[:free]
+        self.seen += free
+        rows = rows[free:]
+        if len(rows) == 0:
+            return
+
+        # Row number i replaces a random slot with probability size / (i + 1);
+        # when several rows of the chunk pick the same slot the last one wins,
+        # as it would when processing them one at a time
+        positions = self.seen + np.arange(len(rows))
+        slots = self.random.randint(0, positions + 1)
+        chosen = np.nonzero(slots < self.size)[0][::-1]
+        unique_slots, last = np.unique(slots[chosen], return_index=True)
+        self.rows[unique_slots] = rows[chosen[last]]
+        self.seen += len(rows)
+
+    @property
+    def sample(self):
+        """Sampled rows, at most size of them."""
+        return self.rows[:min(self.seen, self.size)]
+
+
+_scoring_models = {}
+
+
+def score_chunk(model_path, X, y, keep_columns=None):
+    """
+    Predict one chunk, typically inside a worker process.
+
+    The model is loaded once per process and reused for later chunks.
+
+    Args:
+        model_path (str): Saved model path
+        X (DataFrame): Chunk features
+        y (Series): Chunk target
+        keep_columns (list): Feature columns to send back with the
+            predictions, e.g. for per-segment metrics
+
+    Returns:
+        tuple: (y_true, y_pred, X[keep_columns] or None)
+    """
+    if model_path not in _scoring_models:
+        _scoring_models[model_path] = joblib.load(model_path)
+    kept = X[keep_columns] if keep_columns else None
+    return np.asarray(y, dtype=float), _scoring_models[model_path].predict(X), kept
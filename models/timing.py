@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+
+def measure_latency(pipeline, X, single_row_repeats=50, batch_repeats=3):
+    """
+    Measure single-row and batch inference latency of a fitted pipeline.
+
+    Single rows are predicted one DataFrame at a time, the way the API calls
+    predict_sales; the batch figure is the whole of X in one call.
+
+    Args:
+        pipeline (Pipeline): Fitted pipeline
+        X (DataFrame): Rows to predict
+        single_row_repeats (int): Number of single-row predictions to time
+        batch_repeats (int): Number of full-batch predictions to time
+
+    Returns:
+        dict: Median single-row latency in ms and batch latency in us per row
+    """
+    rows = [X.iloc[[i % len(X)]] for i in range(single_row_repeats)]
+    pipeline.predict(rows[0])  # Warm-up
+
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        pipeline.predict(row)
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for _ in range(batch_repeats):
+        start = time.perf_counter()
+        pipeline.predict(X)
+        batch.append(time.perf_counter() - start)
+
+    return {
+        'single_row_ms': float(np.median(single)) * 1e3,
+        'batch_us_per_row': float(np.median(batch)) / len(X) * 1e6
+    }
@@ -0,0 +1,165 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDRegressor
+from sklearn.neural_network import MLPRegressor
+from artifact import save_artifact
+from streaming import RunningMoments, RunningRegressionMetrics, CategoryCounts, ReservoirSample
+from drift import drift_reference
+from profiler import ResourceMonitor
+
+# Add parent directory to path for the synthetic data generator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_data import scaled_dataset
+
+# Out-of-core training settings; SYNTHETIC_SCALE trains on a generated dataset that many times larger
+DATA_PATH = os.environ.get('CHUNKED_DATA_PATH') or scaled_dataset('../data/processed_data.csv')
+CHUNK_SIZE = int(os.environ.get('CHUNK_SIZE', 100000))
+EPOCHS = int(os.environ.get('CHUNKED_EPOCHS', 5))
+HOLDOUT_SIZE = float(os.environ.get('CHUNKED_HOLDOUT_SIZE', 0.2))
+CHUNKED_MODEL = os.environ.get('CHUNKED_MODEL', 'sgd')  # or 'mlp'
+# The chunked model is saved aside; CHUNKED_MODEL_DIR=../backend/model replaces the served model
+CHUNKED_MODEL_DIR = os.environ.get('CHUNKED_MODEL_DIR', '../backend/model/chunked')
+
+categorical_features = ['Item Fat Content', 'Item Type', 'Outlet Identifier',
+                        'Outlet Size', 'Outlet Location Type', 'Outlet Type',
+                        'Item Identifier Prefix']
+numerical_features = ['Outlet Establishment Year', 'Item Visibility', 'Item Weight', 'Rating']
+
+# Create directories if they don't exist
+os.makedirs(CHUNKED_MODEL_DIR, exist_ok=True)
+
+start_time = time.time()
+# Peak RSS is sampled from a background thread; tracing every allocation would slow the chunk loop
+monitor = ResourceMonitor(interval=0.1).start()
+peak_chunk_bytes = 0
+
+
+def read_chunks():
+    """Stream the cleaned dataset chunk by chunk with a fixed holdout mask per chunk."""
+    global peak_chunk_bytes
+    reader = pd.read_csv(DATA_PATH, chunksize=CHUNK_SIZE)
+    for chunk_no, chunk in enumerate(reader):
+        # Same cleaning as train_model.py
+        chunk['Item Fat Content'] = chunk['Item Fat Content'].replace(['LF', 'low fat', 'Low Fat'], 'Low Fat')
+        chunk['Item Fat Content'] = chunk['Item Fat Content'].replace(['reg', 'Regular'], 'Regular')
+        chunk['Item Identifier Prefix'] = chunk['Item Identifier'].str[:2]
+
+        # Seeding per chunk keeps the same rows in the holdout on every pass
+        holdout = np.random.RandomState(42 + chunk_no).rand(len(chunk)) < HOLDOUT_SIZE
+        peak_chunk_bytes = max(peak_chunk_bytes, int(chunk.memory_usage(deep=True).sum()))
+        yield chunk, holdout
+
+
+# Pass 1: running imputation and scaler statistics plus category vocabularies
+print(f"Computing statistics over {DATA_PATH} in chunks of {CHUNK_SIZE} rows...")
+moments = {col: RunningMoments() for col in numerical_features}
+counts = {col: CategoryCounts() for col in categorical_features}
+# Uniform sample of the numeric columns for the drift reference's quantile bins
+numeric_sample = ReservoirSample(100000, len(numerical_features))
+n_rows = 0
+for chunk, holdout in read_chunks():
+    train = chunk[~holdout]
+    for col in numerical_features:
+        moments[col].update(train[col])
+    for col in categorical_features:
+        counts[col].update(train[col])
+    numeric_sample.update(train[numerical_features].apply(pd.to_numeric, errors='coerce').values)
+    n_rows += len(chunk)
+print(f"Rows streamed: {n_rows}")
+
+for col in numerical_features:
+    print(f"  {col}: mean = {moments[col].mean:.4f}, missing = {moments[col].missing}")
+for col in categorical_features:
+    print(f"  {col}: mode = {counts[col].mode}, {len(counts[col].categories)} categories")
+
+# Same preprocessor as train_model.py, with the vocabularies fixed up front
+preprocessor = ColumnTransformer(
+    transformers=[
+        ('num', Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='mean')),
+            ('scaler', StandardScaler())
+        ]), numerical_features),
+        ('cat', Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='most_frequent')),
+            ('onehot', OneHotEncoder(categories=[counts[col].categories for col in categorical_features],
+                                     handle_unknown='ignore'))
+        ]), categorical_features)
+    ]
+)
+
+# Fit the preprocessor on a two-row frame that has exactly the streamed
+# statistics: mean +/- std reproduces each column's mean and (imputed)
+# population variance, and repeating the mode makes it the most frequent value
+summary = {}
+for col in numerical_features:
+    std = np.sqrt(moments[col].imputed_variance)
+    summary[col] = [moments[col].mean - std, moments[col].mean + std]
+for col in categorical_features:
+    summary[col] = [counts[col].mode] * 2
+preprocessor.fit(pd.DataFrame(summary))
+
+# Pass 2+: incremental fitting, one chunk at a time
+if CHUNKED_MODEL == 'mlp':
+    model = MLPRegressor(hidden_layer_sizes=(64, 32), learning_rate_init=0.001, random_state=42)
+else:
+    model = SGDRegressor(learning_rate='adaptive', eta0=0.01, random_state=42)
+
+for epoch in range(EPOCHS):
+    for chunk, holdout in read_chunks():
+        train = chunk[~holdout]
+        X_chunk = preprocessor.transform(train[categorical_features + numerical_features])
+        model.partial_fit(X_chunk, train['Sales'].values)
+    print(f"Epoch {epoch + 1}/{EPOCHS} complete")
+
+pipeline = Pipeline(steps=[
+    ('preprocessor', preprocessor),
+    ('model', model)
+])
+
+# Streaming holdout evaluation; running means avoid the cancellation of
+# sum(y²) - sum(y)² / n on large holdouts
+metrics = RunningRegressionMetrics()
+for chunk, holdout in read_chunks():
+    test = chunk[holdout]
+    if test.empty:
+        continue
+    metrics.update(test['Sales'].values, pipeline.predict(test[categorical_features + numerical_features]))
+
+accuracy = max(0, 100 * metrics.r2)
+print(f"\n{type(model).__name__} holdout performance ({metrics.count} rows):")
+print(f"  MSE: {metrics.mse:.4f}")
+print(f"  RMSE: {metrics.rmse:.4f}")
+print(f"  R2: {metrics.r2:.4f}")
+print(f"  MAE: {metrics.mae:.4f}")
+print(f"  Accuracy (%): {accuracy:.4f}")
+
+# Save with the same artifact contract as train_model.py
+model_path = os.path.join(CHUNKED_MODEL_DIR, 'sales_model.pkl')
+save_artifact(pipeline, model_path, os.path.join(CHUNKED_MODEL_DIR, 'manifest.json'),
+              categorical_features, numerical_features,
+              compress=int(os.environ.get('MODEL_COMPRESS', 0)),
+              model_name=f"Chunked {type(model).__name__}",
+              metrics={'MSE': float(metrics.mse), 'RMSE': metrics.rmse, 'R2': float(metrics.r2),
+                       'MAE': float(metrics.mae)},
+              drift_reference=drift_reference(pd.DataFrame(numeric_sample.sample, columns=numerical_features),
+                                              categorical_features, numerical_features,
+                                              category_counts={col: counts[col].counts for col in categorical_features}))
+if os.path.exists(os.path.join(CHUNKED_MODEL_DIR, 'features.pkl')):
+    os.remove(os.path.join(CHUNKED_MODEL_DIR, 'features.pkl'))
+print(f"Model saved to {model_path}")
+
+# Memory report
+usage = monitor.stop()
+print("\nPeak memory:")
+print(f"  Largest chunk in memory: {peak_chunk_bytes / 1024 ** 2:.1f} MB")
+if usage['peak_rss_mb'] is not None:
+    print(f"  Peak RSS: {usage['peak_rss_mb']:.1f} MB")
+
+print(f"\nOut-of-core training complete in {time.time() - start_time:.1f}s!")
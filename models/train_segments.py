@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+import json
+import re
+import sys
+import os
+import time
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error
+import joblib
+from artifact import save_artifact, load_manifest
+
+# Add parent directory to path for the shared dataset layer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset import load_dataset
+
+# Segment model settings: one model per value of SEGMENT_FEATURE with at least
+# MIN_SEGMENT_ROWS rows, kept only if it beats the global model on its holdout rows
+SEGMENT_FEATURE = os.environ.get('SEGMENT_FEATURE', 'Outlet Type')
+MIN_SEGMENT_ROWS = int(os.environ.get('MIN_SEGMENT_ROWS', 500))
+HOLDOUT_SIZE = float(os.environ.get('SEGMENT_HOLDOUT_SIZE', 0.2))
+DATA_PATH = '../data/processed_data.csv'
+MODEL_PATH = '../backend/model/sales_model.pkl'
+MANIFEST_PATH = '../backend/model/manifest.json'
+LEGACY_FEATURES_PATH = '../backend/model/features.pkl'
+SEGMENTS_DIR = '../backend/model/segments'
+ROUTES_PATH = '../backend/model/routes.json'
+MODEL_COMPRESS = int(os.environ.get('MODEL_COMPRESS', 0))
+
+start_time = time.time()
+
+features = load_manifest(MANIFEST_PATH, LEGACY_FEATURES_PATH)
+if features is None:
+    raise Exception("No model manifest found, run train_model.py first")
+categorical_features = features['categorical_features']
+numerical_features = features['numerical_features']
+
+print(f"Loading data from {DATA_PATH}...")
+df = load_dataset(DATA_PATH)
+
+# Apply the same cleaning as train_model.py
+df['Item Fat Content'] = df['Item Fat Content'].replace(['LF', 'low fat', 'Low Fat'], 'Low Fat')
+df['Item Fat Content'] = df['Item Fat Content'].replace(['reg', 'Regular'], 'Regular')
+if 'Item Identifier Prefix' not in df.columns:
+    df['Item Identifier Prefix'] = df['Item Identifier'].str[:2]
+if SEGMENT_FEATURE not in categorical_features + numerical_features:
+    raise Exception(f"{SEGMENT_FEATURE} is not a model feature")
+
+X = df[categorical_features + numerical_features]
+y = df['Sales']
+X_train, X_holdout, y_train, y_holdout = train_test_split(X, y, test_size=HOLDOUT_SIZE, random_state=42)
+
+# The global model's configuration, refitted on the training split so both
+# sides of the comparison have never seen the holdout rows
+print("Fitting the global model on the training split...")
+pipeline = joblib.load(MODEL_PATH)
+pipeline = pipeline.best_estimator_ if hasattr(pipeline, 'best_estimator_') else pipeline
+global_model = clone(pipeline).fit(X_train, y_train)
+global_predictions = pd.Series(global_model.predict(X_holdout), index=X_holdout.index)
+
+
+def rmse(y_true, y_pred):
+    """Root mean squared error."""
+    return float(np.sqrt(mean_squared_error(y_true, y_pred)))
+
+
+def slug(value):
+    """File name part of a segment value."""
+    return re.sub(r'[^a-z0-9]+', '_', str(value).lower()).strip('_')
+
+
+os.makedirs(SEGMENTS_DIR, exist_ok=True)
+routes = []
+print(f"\nSegments of {SEGMENT_FEATURE}:")
+print(f"  {'Segment':<24}{'Rows':>8}{'Global RMSE':>14}{'Segment RMSE':>14}  Routed")
+for value, rows in X[SEGMENT_FEATURE].value_counts().items():
+    value = value.item() if hasattr(value, 'item') else value
+    train_mask = X_train[SEGMENT_FEATURE] == value
+    holdout_mask = X_holdout[SEGMENT_FEATURE] == value
+    if rows < MIN_SEGMENT_ROWS or not holdout_mask.any():
+        print(f"  {str(value):<24}{rows:>8}{'':>14}{'':>14}  no (too few rows)")
+        continue
+
+    segment_model = clone(pipeline).fit(X_train[train_mask], y_train[train_mask])
+    global_rmse = rmse(y_holdout[holdout_mask], global_predictions[holdout_mask])
+    segment_rmse = rmse(y_holdout[holdout_mask], segment_model.predict(X_holdout[holdout_mask]))
+    routed = segment_rmse < global_rmse
+    print(f"  {str(value):<24}{rows:>8}{global_rmse:>14.2f}{segment_rmse:>14.2f}  {'yes' if routed else 'no'}")
+    if not routed:
+        continue
+
+    # The served segment model is refitted on all of the segment's rows
+    name = f"{slug(SEGMENT_FEATURE)}-{slug(value)}"
+    segment_model = clone(pipeline).fit(X[X[SEGMENT_FEATURE] == value], y[X[SEGMENT_FEATURE] == value])
+    save_artifact(segment_model, os.path.join(SEGMENTS_DIR, name + '.pkl'),
+                  os.path.join(SEGMENTS_DIR, name + '.json'), categorical_features, numerical_features,
+                  compress=MODEL_COMPRESS,
+                  segment={SEGMENT_FEATURE: value},
+                  segment_rows=int(rows),
+                  holdout_rmse={'global': global_rmse, 'segment': segment_rmse})
+    routes.append({'name': name, 'model': f"segments/{name}.pkl", 'when': {SEGMENT_FEATURE: value}})
+
+# Records of segments without a model of their own fall back to the global model
+tmp_path = ROUTES_PATH + '.tmp'
+with open(tmp_path, 'w') as f:
+    json.dump({'routes': routes}, f, indent=2, default=str)
+os.replace(tmp_path, ROUTES_PATH)
+print(f"\n{len(routes)} segment models routed in backend/model/{os.path.basename(ROUTES_PATH)}")
+
+print(f"\nSegment training complete in {time.time() - start_time:.1f}s!")
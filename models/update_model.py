@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+import shutil
+import sys
+import os
+import time
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+import joblib
+from artifact import save_artifact, load_manifest
+from incremental import unseen_categories, update_estimator, is_worse
+
+# Add parent directory to path for the shared dataset layer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset import load_prediction_logs
+
+# Incremental update settings
+NEW_DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else '../data/new_sales.csv'
+INCREMENT_TREES = int(os.environ.get('INCREMENT_TREES', 20))
+HOLDOUT_SIZE = float(os.environ.get('UPDATE_HOLDOUT_SIZE', 0.2))
+MODEL_PATH = '../backend/model/sales_model.pkl'
+BACKUP_PATH = '../backend/model/sales_model.prev.pkl'
+MANIFEST_PATH = '../backend/model/manifest.json'
+MANIFEST_BACKUP_PATH = '../backend/model/manifest.prev.json'
+LEGACY_FEATURES_PATH = '../backend/model/features.pkl'
+MODEL_COMPRESS = int(os.environ.get('MODEL_COMPRESS', 0))
+# An update whose holdout RMSE is worse than the previous model's by more
+# than this fraction is not saved, unless UPDATE_ALLOW_WORSE is set
+UPDATE_RMSE_TOLERANCE = float(os.environ.get('UPDATE_RMSE_TOLERANCE', 0.0))
+UPDATE_ALLOW_WORSE = os.environ.get('UPDATE_ALLOW_WORSE', 'False') == 'True'
+
+start_time = time.time()
+
+# Load the new rows only: a CSV, or a prediction log directory with the realized sales joined in
+print(f"Loading new sales data from {NEW_DATA_PATH}...")
+if os.path.isdir(NEW_DATA_PATH):
+    df = load_prediction_logs(NEW_DATA_PATH)
+    if 'Sales' not in df.columns:
+        raise Exception("Prediction logs need a Sales column with the realized sales to update the model")
+else:
+    df = pd.read_csv(NEW_DATA_PATH)
+print(f"New rows: {len(df)}")
+
+# Load the feature lists from the model manifest
+features = load_manifest(MANIFEST_PATH, LEGACY_FEATURES_PATH)
+if features is None:
+    raise Exception("No model manifest found, run train_model.py first")
+
+categorical_features = features['categorical_features']
+numerical_features = features['numerical_features']
+
+# Apply the same cleaning as train_model.py
+df['Item Fat Content'] = df['Item Fat Content'].replace(['LF', 'low fat', 'Low Fat'], 'Low Fat')
+df['Item Fat Content'] = df['Item Fat Content'].replace(['reg', 'Regular'], 'Regular')
+if 'Item Identifier Prefix' not in df.columns:
+    df['Item Identifier Prefix'] = df['Item Identifier'].str[:2]
+
+X = df[categorical_features + numerical_features]
+y = df['Sales']
+
+# Hold out part of the new rows to compare the previous and updated model
+X_new, X_holdout, y_new, y_holdout = train_test_split(X, y, test_size=HOLDOUT_SIZE, random_state=42)
+
+# Load the current model; a saved GridSearchCV is reduced to its fitted pipeline
+print("Loading current model...")
+model = joblib.load(MODEL_PATH)
+pipeline = model.best_estimator_ if hasattr(model, 'best_estimator_') else model
+preprocessor = pipeline.named_steps['preprocessor']
+estimator = pipeline.named_steps['model']
+
+# Unseen categories are only reported; a full retrain is needed to learn them
+encoder = preprocessor.named_transformers_['cat'].steps[-1][1]
+print("\nCategories not seen during training:")
+unseen = unseen_categories(encoder, categorical_features, X)
+for column, (values, share) in unseen.items():
+    print(f"  {column}: {values} ({share:.1f}% of new rows)")
+if not unseen:
+    print("  None")
+
+
+def holdout_metrics(pipeline):
+    """Compute holdout metrics for a fitted pipeline."""
+    y_pred = pipeline.predict(X_holdout)
+    mse = mean_squared_error(y_holdout, y_pred)
+    r2 = r2_score(y_holdout, y_pred)
+    return {
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'R2': r2,
+        'MAE': mean_absolute_error(y_holdout, y_pred),
+        'Accuracy (%)': max(0, 100 * r2)
+    }
+
+
+previous_performance = holdout_metrics(pipeline)
+
+# Update the final estimator on the new rows only, without refitting the preprocessor
+X_new_transformed = preprocessor.transform(X_new)
+print(f"\n{update_estimator(estimator, X_new_transformed, y_new, INCREMENT_TREES)}")
+
+updated_performance = holdout_metrics(pipeline)
+
+# Report holdout metrics against the previous version
+print(f"\nHoldout metrics on {len(X_holdout)} new rows:")
+print(f"  {'Metric':<14}{'Previous':>12}{'Updated':>12}")
+for metric in previous_performance:
+    print(f"  {metric:<14}{previous_performance[metric]:>12.4f}{updated_performance[metric]:>12.4f}")
+
+if is_worse(previous_performance, updated_performance, UPDATE_RMSE_TOLERANCE):
+    if not UPDATE_ALLOW_WORSE:
+        raise Exception("The updated model has a worse holdout RMSE than the previous one and was not saved; "
+                        "set UPDATE_ALLOW_WORSE=True to save it anyway")
+    print("\nWarning: the updated model has a worse holdout RMSE, saving it as UPDATE_ALLOW_WORSE is set")
+
+# Keep the previous version and its manifest next to the updated one
+shutil.copyfile(MODEL_PATH, BACKUP_PATH)
+if os.path.exists(MANIFEST_PATH):
+    shutil.copyfile(MANIFEST_PATH, MANIFEST_BACKUP_PATH)
+
+# The saved model no longer matches a plain train_model.py run on the
+# training data, so its fingerprint is dropped to make the next run retrain
+save_artifact(pipeline, MODEL_PATH, MANIFEST_PATH, categorical_features, numerical_features,
+              compress=MODEL_COMPRESS,
+              model_name=features.get('model_name'),
+              best_params=features.get('best_params'),
+              incremental_updates=features.get('incremental_updates', 0) + 1,
+              drift_reference=features.get('drift_reference'),
+              update_holdout_metrics={metric: float(value) for metric, value in updated_performance.items()})
+if os.path.exists(LEGACY_FEATURES_PATH):
+    os.remove(LEGACY_FEATURES_PATH)
+print(f"\nPrevious model backed up to backend/model/{os.path.basename(BACKUP_PATH)} "
+      f"and {os.path.basename(MANIFEST_BACKUP_PATH)}")
+print("Updated model saved to backend/model/sales_model.pkl")
+
+print(f"\nIncremental update complete in {time.time() - start_time:.1f}s!")